@@ -1,9 +1,79 @@
-from dataclasses import dataclass
+import os
+
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from core.types import CycleType
+
+
+@dataclass(frozen=True)
+class CycleSchedule:
+    """Набор циклов, которые запускаются вместе, по порядку, раз в interval.
+
+    Все значения указываются в секундах.
+    """
+    cycles: tuple[CycleType, ...]
+    interval: float
+    delay: float = 0
+
 
 @dataclass(frozen=True)
 class ScenarioSettings:
     scenario_name: str
     scenario_dir_path: Path
     tg_chat_id: int | str
+    stream_generation: bool = False
+    context_token_budget: int = 1500
+    memory_max_chars: int = 2000
+    schedules: tuple[CycleSchedule, ...] = field(default_factory=tuple)
+
+
+def load_scenario_settings(
+    scenario_name: str,
+    scenarios_path: Path,
+) -> ScenarioSettings:
+    prefix = scenario_name.upper()
+    state_interval = float(os.getenv(f"{prefix}_STATE_INTERVAL", "21600"))
+    news_interval = float(
+        os.getenv(f"{prefix}_NEWS_INTERVAL", str(state_interval)),
+    )
+    news_delay = float(
+        os.getenv(f"{prefix}_NEWS_DELAY", str(state_interval / 2)),
+    )
+    speculative = (
+        os.getenv(f"{prefix}_SPECULATIVE_GENERATION", "true") == "true"
+    )
+    stream_generation = (
+        os.getenv(f"{prefix}_STREAM_GENERATION", "false") == "true"
+    )
+    context_token_budget = int(
+        os.getenv(f"{prefix}_CONTEXT_TOKEN_BUDGET", "1500"),
+    )
+    long_term_memory = (
+        os.getenv(f"{prefix}_LONG_TERM_MEMORY", "true") == "true"
+    )
+    memory_max_chars = int(os.getenv(f"{prefix}_MEMORY_MAX_CHARS", "2000"))
+    state_cycles: tuple[CycleType, ...] = (CycleType.TICK,)
+    if long_term_memory:
+        state_cycles = (*state_cycles, CycleType.MEMORY)
+    if speculative:
+        state_cycles = (*state_cycles, CycleType.SPECULATION)
+    return ScenarioSettings(
+        scenario_name=scenario_name,
+        scenario_dir_path=scenarios_path / scenario_name,
+        tg_chat_id=os.getenv(f"{prefix}_TG_CHAT_ID", ""),
+        stream_generation=stream_generation,
+        context_token_budget=context_token_budget,
+        memory_max_chars=memory_max_chars,
+        schedules=(
+            CycleSchedule(
+                cycles=state_cycles,
+                interval=state_interval,
+            ),
+            CycleSchedule(
+                cycles=(CycleType.NEWS,),
+                interval=news_interval,
+                delay=news_delay,
+            ),
+        ),
+    )
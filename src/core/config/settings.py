@@ -13,6 +13,17 @@ class PostgresSettings:
     host: str = ""
     port: int = 5432
     database: str = ""
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    # Соединения старше pool_recycle секунд пересоздаются; -1 отключает
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Лимит на выполнение одного запроса в секундах; 0 отключает
+    statement_timeout: float = 30
+    # pgbouncer в режиме transaction pooling: без собственного пула и
+    # без именованных prepared statements
+    pgbouncer: bool = False
 
     @property
     def psycopg_dsn(self) -> str:
@@ -21,16 +32,73 @@ class PostgresSettings:
             f"@{self.host}:{self.port}/{self.database}"
         )
 
+    @property
+    def asyncpg_dsn(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.user}:{self.password}"
+            f"@{self.host}:{self.port}/{self.database}"
+        )
+
 
 @dataclass(frozen=True)
 class GeminiSettings:
     api_key: str = ""
     model: str = "gemini-2.5-pro-preview-03-25"
+    max_attempts: int = 3
+    max_concurrency: int = 4
+    request_timeout: float = 120
+    # Время жизни context cache со статической частью промпта; 0 отключает
+    context_cache_ttl: int = 3600
+    # Цена в долларах за миллион токенов, для учёта стоимости вызовов
+    input_price: float = 0
+    output_price: float = 0
 
 
 @dataclass(frozen=True)
 class TelegramSettings:
     token: str = ""
+    request_timeout: int = 10
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    global_rate: float = 30
+    chat_rate_per_minute: float = 20
+    chat_burst: float = 3
+    max_flood_retries: int = 3
+    max_attempts: int = 3
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    max_concurrency: int = 8
+    # Как часто свободный воркер проверяет scenario_jobs, в секундах
+    poll_interval: float = 5
+    # Аренда задачи в секундах; пока цикл выполняется, она продлевается
+    lease: float = 300
+    shutdown_timeout: float = 60
+
+
+@dataclass(frozen=True)
+class OutboxSettings:
+    batch_size: int = 20
+    poll_interval: float = 1
+    # Аренда пачки в секундах; неподтверждённые за это время публикации
+    # снова становятся доступны для отправки
+    lease: float = 300
+    max_attempts: int = 5
+    retry_delay: float = 5
+    max_retry_delay: float = 300
+
+
+@dataclass(frozen=True)
+class CircuitBreakerSettings:
+    failure_threshold: int = 5
+    recovery_timeout: float = 30
+
+
+@dataclass(frozen=True)
+class LLMCacheSettings:
+    ttl: int = 86400
+    max_entries: int = 10000
 
 
 @dataclass(frozen=True)
@@ -39,6 +107,12 @@ class AppSettings:
     postgres: PostgresSettings = field(default_factory=PostgresSettings)
     gemini: GeminiSettings = field(default_factory=GeminiSettings)
     telegram: TelegramSettings = field(default_factory=TelegramSettings)
+    scheduler: SchedulerSettings = field(default_factory=SchedulerSettings)
+    outbox: OutboxSettings = field(default_factory=OutboxSettings)
+    circuit_breaker: CircuitBreakerSettings = field(
+        default_factory=CircuitBreakerSettings,
+    )
+    llm_cache: LLMCacheSettings = field(default_factory=LLMCacheSettings)
 
     @property
     def scenarios_path(self) -> Path:
@@ -56,16 +130,75 @@ def load_app_settings(env_file: Path | None = None):
         host=os.getenv("POSTGRES_HOST", "localhost"),
         port=int(os.getenv("POSTGRES_PORT", "5432")),
         database=os.getenv("POSTGRES_DATABASE", "postgres"),
+        pool_size=int(os.getenv("POSTGRES_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("POSTGRES_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("POSTGRES_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("POSTGRES_POOL_RECYCLE", "1800")),
+        pool_pre_ping=os.getenv("POSTGRES_POOL_PRE_PING", "true") == "true",
+        statement_timeout=float(
+            os.getenv("POSTGRES_STATEMENT_TIMEOUT", "30"),
+        ),
+        pgbouncer=os.getenv("POSTGRES_PGBOUNCER", "false") == "true",
     )
     gemini_settings = GeminiSettings(
         api_key=os.getenv("GEMINI_API_KEY", ""),
         model=os.getenv("GEMINI_MODEL", "gemini-2.5-pro-preview-03-25"),
+        max_attempts=int(os.getenv("GEMINI_MAX_ATTEMPTS", "3")),
+        max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+        request_timeout=float(os.getenv("GEMINI_REQUEST_TIMEOUT", "120")),
+        context_cache_ttl=int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600")),
+        input_price=float(os.getenv("GEMINI_INPUT_PRICE", "0")),
+        output_price=float(os.getenv("GEMINI_OUTPUT_PRICE", "0")),
     )
     telegram_settings = TelegramSettings(
         token=os.getenv("TG_TOKEN", ""),
+        request_timeout=int(os.getenv("TG_REQUEST_TIMEOUT", "10")),
+        max_connections=int(os.getenv("TG_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(
+            os.getenv("TG_MAX_KEEPALIVE_CONNECTIONS", "20"),
+        ),
+        global_rate=float(os.getenv("TG_GLOBAL_RATE", "30")),
+        chat_rate_per_minute=float(
+            os.getenv("TG_CHAT_RATE_PER_MINUTE", "20"),
+        ),
+        chat_burst=float(os.getenv("TG_CHAT_BURST", "3")),
+        max_flood_retries=int(os.getenv("TG_MAX_FLOOD_RETRIES", "3")),
+        max_attempts=int(os.getenv("TG_MAX_ATTEMPTS", "3")),
+    )
+    scheduler_settings = SchedulerSettings(
+        max_concurrency=int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "8")),
+        poll_interval=float(os.getenv("SCHEDULER_POLL_INTERVAL", "5")),
+        lease=float(os.getenv("SCHEDULER_LEASE", "300")),
+        shutdown_timeout=float(
+            os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT", "60"),
+        ),
+    )
+    outbox_settings = OutboxSettings(
+        batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "20")),
+        poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", "1")),
+        lease=float(os.getenv("OUTBOX_LEASE", "300")),
+        max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5")),
+        retry_delay=float(os.getenv("OUTBOX_RETRY_DELAY", "5")),
+        max_retry_delay=float(os.getenv("OUTBOX_MAX_RETRY_DELAY", "300")),
+    )
+    circuit_breaker_settings = CircuitBreakerSettings(
+        failure_threshold=int(
+            os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"),
+        ),
+        recovery_timeout=float(
+            os.getenv("CIRCUIT_BREAKER_RECOVERY_TIMEOUT", "30"),
+        ),
+    )
+    llm_cache_settings = LLMCacheSettings(
+        ttl=int(os.getenv("LLM_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
     )
     return AppSettings(
         postgres=postgres_settings,
         gemini=gemini_settings,
         telegram=telegram_settings,
+        scheduler=scheduler_settings,
+        outbox=outbox_settings,
+        circuit_breaker=circuit_breaker_settings,
+        llm_cache=llm_cache_settings,
     )
@@ -0,0 +1,84 @@
+import json
+import logging
+import math
+
+from collections.abc import Mapping
+from typing import Any
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Грубая, но стабильная оценка: около 4 байт UTF-8 на токен, кириллица
+# при этом оценивается с запасом
+BYTES_PER_TOKEN = 4
+ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class ContextBuilder:
+    """Сериализует данные для промпта в компактный JSON.
+
+    Результат укладывается в max_tokens. Если он не помещается, поля
+    урезаются с конца: у списков отбрасываются последние элементы,
+    строки обрезаются, а поля, которые урезать нельзя, удаляются.
+    Один и тот же вход всегда даёт один и тот же результат.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def build(
+        self,
+        data: BaseModel | Mapping[str, Any],
+        fields: tuple[str, ...] | None = None,
+    ) -> str:
+        if isinstance(data, BaseModel):
+            data = data.model_dump(mode="json")
+        payload = {
+            key: data[key]
+            for key in (fields if fields is not None else data)
+            if key in data
+        }
+        text = _dumps(payload)
+        for key in reversed(list(payload)):
+            if self._fits(text):
+                break
+            text = self._truncate(payload, key)
+        if not self._fits(text):
+            logger.warning(
+                f"Context of {estimate_tokens(text)} tokens exceeds "
+                f"budget of {self.max_tokens}",
+            )
+        return text
+
+    def _fits(self, text: str) -> bool:
+        return estimate_tokens(text) <= self.max_tokens
+
+    def _truncate(self, payload: dict[str, Any], key: str) -> str:
+        value = payload[key]
+        if isinstance(value, list):
+            value = list(value)
+            payload[key] = value
+            while value and not self._fits(_dumps(payload)):
+                value.pop()
+        elif isinstance(value, str):
+            encoded = value.encode("utf-8")
+            while encoded and not self._fits(_dumps(payload)):
+                excess = (
+                    estimate_tokens(_dumps(payload)) - self.max_tokens
+                ) * BYTES_PER_TOKEN
+                encoded = encoded[:max(0, len(encoded) - excess)]
+                payload[key] = (
+                    encoded.decode("utf-8", errors="ignore") + ELLIPSIS
+                )
+        else:
+            del payload[key]
+        return _dumps(payload)
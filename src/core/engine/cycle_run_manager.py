@@ -0,0 +1,98 @@
+from datetime import timedelta
+from typing import Any
+
+from core.infra.db.models.cycle_run import CycleRun
+from core.infra.repositories.cycle_run import CycleRunRepository
+from core.types import CycleStage, CycleType
+
+
+class CycleRunManager:
+    """Идемпотентность циклов: один успешный запуск на состояние.
+
+    Цикл забирает ключ (сценарий, состояние, тип цикла) в транзакции
+    чтения, до вызовов LLM и Telegram, а отмечает выполненным в той же
+    транзакции, что и свой результат. Повтор или дублирующий запуск
+    цикла для того же состояния тогда ничего не стоит.
+
+    Между транзакциями цикл сохраняет пройденный этап и его результат,
+    поэтому запуск, упавший после вызова LLM, продолжается с этого
+    этапа без повторной генерации.
+
+    Запуск, простоявший в started дольше stale_after, считается
+    прерванным. Это аренда задачи планировщика: пока воркер жив, он
+    продлевает её и никто другой цикл сценария не запускает, а после её
+    истечения задачу и зависший запуск забирает другой воркер.
+    """
+
+    def __init__(
+        self,
+        cycle_run_repository: CycleRunRepository,
+        stale_after: timedelta,
+    ):
+        self.cycle_run_repo = cycle_run_repository
+        self.stale_after = stale_after
+
+    async def claim(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+    ) -> CycleRun | None:
+        return await self.cycle_run_repo.claim_run(
+            scenario_name=scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+            stale_after=self.stale_after,
+        )
+
+    async def checkpoint(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        stage: CycleStage,
+        data: dict[str, Any],
+    ) -> None:
+        await self.cycle_run_repo.save_checkpoint(
+            scenario_name=scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+            stage=stage,
+            checkpoint=data,
+        )
+
+    @staticmethod
+    def get_checkpoint(
+        run: CycleRun,
+        stage: CycleStage,
+    ) -> dict[str, Any] | None:
+        """Данные этапа stage, если прошлый запуск успел его пройти."""
+        if run.stage != stage:
+            return None
+        return run.checkpoint
+
+    async def complete(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+    ) -> None:
+        await self.cycle_run_repo.complete_run(
+            scenario_name=scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+        )
+
+    async def fail(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        error: str,
+    ) -> None:
+        await self.cycle_run_repo.fail_run(
+            scenario_name=scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+            error=error,
+        )
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import time
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.infra.repositories.llm_cache import LLMCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    prompt: str,
+    model: str,
+    response_schema_cls: type[BaseModel],
+    temperature: float,
+) -> str:
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model,
+            "schema": response_schema_cls.model_json_schema(),
+            "temperature": temperature,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} "
+            f"hit_rate={self.hit_rate:.1%}"
+        )
+
+
+class LLMResponseCache:
+    """Долговременный кэш ответов LLM в таблице llm_cache.
+
+    Каждое обращение идёт в собственной короткой транзакции, поэтому
+    сохранённый ответ переживает откат цикла, в котором его получили.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        ttl: timedelta,
+        max_entries: int,
+        eviction_interval: float = 3600,
+    ):
+        self.session_maker = session_maker
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.eviction_interval = eviction_interval
+        self.stats = CacheStats()
+        self._last_eviction = 0.0
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        async with self.session_maker() as session, session.begin():
+            repo = LLMCacheRepository(session=session)
+            entry = await repo.get_entry(key=key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            await repo.increment_hits(key=key)
+            response = entry.response
+        self.stats.hits += 1
+        logger.info(f"LLM cache hit {key[:12]} ({self.stats})")
+        return response
+
+    async def set(
+        self,
+        key: str,
+        model: str,
+        response: dict[str, Any],
+    ) -> None:
+        """Сохраняет ответ; сбой записи не роняет уже сгенерированное."""
+        try:
+            async with self.session_maker() as session, session.begin():
+                await LLMCacheRepository(session=session).add_entry(
+                    key=key,
+                    model=model,
+                    response=response,
+                )
+            if (
+                time.monotonic() - self._last_eviction
+                >= self.eviction_interval
+            ):
+                await self.evict()
+        except SQLAlchemyError:
+            logger.exception(f"Failed to write LLM cache entry {key[:12]}")
+
+    async def evict(self) -> None:
+        self._last_eviction = time.monotonic()
+        async with self.session_maker() as session, session.begin():
+            repo = LLMCacheRepository(session=session)
+            expired = await repo.delete_older_than(ttl=self.ttl)
+            overflow = await repo.delete_least_recently_used(
+                keep=self.max_entries,
+            )
+        logger.info(
+            f"LLM cache eviction: {expired} expired, {overflow} over limit "
+            f"({self.stats})",
+        )
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import time
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.infra.db.models.llm_call import LLMCall
+from core.infra.repositories.llm_call import LLMCallRepository
+from core.integrations.gemini import GenerationStats
+from core.types import CycleType
+
+logger = logging.getLogger(__name__)
+
+TOKENS_PER_PRICE_UNIT = 1_000_000
+
+
+class LLMTelemetry:
+    """Записывает каждый вызов LLM в таблицу llm_calls.
+
+    Запись идёт в собственной транзакции, чтобы упавшие и откатившиеся
+    циклы тоже попадали в статистику. Ошибка записи только логируется и
+    не прерывает генерацию. Агрегаты по дням смотрите во view
+    llm_call_daily_stats.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        input_price: float = 0,
+        output_price: float = 0,
+    ):
+        self.session_maker = session_maker
+        self.input_price = input_price
+        self.output_price = output_price
+
+    @asynccontextmanager
+    async def track(
+        self,
+        scenario_name: str,
+        cycle: CycleType,
+        model: str,
+        prompt: str,
+        *,
+        streamed: bool = False,
+    ) -> AsyncIterator[GenerationStats]:
+        stats = GenerationStats()
+        error: BaseException | None = None
+        try:
+            yield stats
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            await self._record(
+                LLMCall(
+                    scenario_name=scenario_name,
+                    cycle=cycle,
+                    model=model,
+                    prompt_hash=hashlib.sha256(
+                        prompt.encode("utf-8"),
+                    ).hexdigest(),
+                    streamed=streamed,
+                    attempts=stats.attempts,
+                    prompt_tokens=stats.prompt_tokens,
+                    cached_tokens=stats.cached_tokens,
+                    response_tokens=stats.response_tokens,
+                    total_tokens=stats.total_tokens,
+                    cost=self._cost(stats),
+                    first_token_latency=(
+                        None
+                        if stats.first_chunk_at is None
+                        else stats.first_chunk_at - stats.started_at
+                    ),
+                    latency=time.monotonic() - stats.started_at,
+                    error=None if error is None else repr(error),
+                ),
+            )
+
+    def _cost(self, stats: GenerationStats) -> float | None:
+        if stats.prompt_tokens is None:
+            return None
+        return (
+            stats.prompt_tokens * self.input_price
+            + (stats.response_tokens or 0) * self.output_price
+        ) / TOKENS_PER_PRICE_UNIT
+
+    async def _record(self, call: LLMCall) -> None:
+        try:
+            async with self.session_maker() as session, session.begin():
+                await LLMCallRepository(session=session).add_call(call)
+        except SQLAlchemyError:
+            logger.exception("Failed to record LLM call telemetry")
+            return
+        logger.info(
+            f"LLM call {call.scenario_name}/{call.cycle}: "
+            f"{call.latency:.2f}s, {call.attempts} attempts, "
+            f"{call.total_tokens} tokens",
+        )
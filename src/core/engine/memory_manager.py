@@ -0,0 +1,98 @@
+import logging
+
+from core.engine.llm_telemetry import LLMTelemetry
+from core.infra.db.models.memory import ScenarioMemory
+from core.infra.repositories.memory import ScenarioMemoryRepository
+from core.integrations.gemini import AsyncGeminiClient
+from core.types import CycleType
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TEMPERATURE = 0.3
+
+MEMORY_PROMPT = """\
+Ты ведёшь краткую летопись вымышленного мира Telegram-канала.
+Обнови летопись, добавив в неё новое событие. Сохрани ключевые сюжетные
+линии, персонажей, причины и последствия; детали старых событий
+сокращай сильнее, чем детали новых. Ответ — только текст летописи,
+не длиннее {max_chars} символов.
+
+Текущая летопись:
+{summary}
+
+Новое событие:
+{state}
+"""
+
+EMPTY_SUMMARY = "Летопись пуста."
+
+
+class MemoryManager:
+    """Долговременная память сценария — сжатая летопись всей истории.
+
+    После каждого нового состояния летопись обновляется одним вызовом
+    LLM по предыдущей летописи и этому состоянию, без чтения истории,
+    поэтому её размер не растёт со временем.
+    """
+
+    def __init__(
+        self,
+        memory_repository: ScenarioMemoryRepository,
+        gemini_client: AsyncGeminiClient,
+        telemetry: LLMTelemetry,
+    ):
+        self.memory_repo = memory_repository
+        self.gemini_client = gemini_client
+        self.telemetry = telemetry
+
+    async def get_memory(self, scenario_name: str) -> ScenarioMemory | None:
+        return await self.memory_repo.get_memory(scenario_name=scenario_name)
+
+    async def get_summary(self, scenario_name: str) -> str | None:
+        memory = await self.get_memory(scenario_name=scenario_name)
+        return None if memory is None else memory.summary
+
+    async def summarize(
+        self,
+        scenario_name: str,
+        summary: str | None,
+        state_context: str,
+        *,
+        max_chars: int,
+    ) -> str:
+        prompt = MEMORY_PROMPT.format(
+            max_chars=max_chars,
+            summary=summary or EMPTY_SUMMARY,
+            state=state_context,
+        )
+        async with self.telemetry.track(
+            scenario_name=scenario_name,
+            cycle=CycleType.MEMORY,
+            model=self.gemini_client.model,
+            prompt=prompt,
+        ) as stats:
+            new_summary = await self.gemini_client.generate_text_raw(
+                prompt=prompt,
+                temperature=MEMORY_TEMPERATURE,
+                stats=stats,
+            )
+        new_summary = new_summary.strip()
+        if len(new_summary) > max_chars:
+            logger.warning(
+                f"Memory summary of {len(new_summary)} chars truncated "
+                f"to {max_chars}",
+            )
+            new_summary = new_summary[:max_chars]
+        return new_summary
+
+    async def save_summary(
+        self,
+        scenario_name: str,
+        summary: str,
+        state_id: int,
+    ) -> None:
+        await self.memory_repo.save_memory(
+            scenario_name=scenario_name,
+            summary=summary,
+            state_id=state_id,
+        )
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config.settings import OutboxSettings
+from core.infra.db.models.outbox import OutboxMessage
+from core.infra.repositories.message import MessageRepository
+from core.infra.repositories.outbox import OutboxRepository
+from core.integrations.rate_limiter import Priority
+from core.integrations.resilience import CircuitOpenError, RetryPolicy
+from core.integrations.telegram import (
+    AsyncTelegramClient,
+    TelegramClientError,
+    TelegramNetworkError,
+)
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_SENDERS: dict[
+    str,
+    Callable[..., Awaitable[dict[str, Any]]],
+] = {
+    "sendMessage": AsyncTelegramClient.send_message,
+    "sendPoll": AsyncTelegramClient.send_poll,
+}
+
+# Сколько раз за срок аренды пачки диспетчер её продлевает
+LEASE_HEARTBEATS = 3
+
+# Результат отправки: ответ Telegram, ошибка или None, если публикация
+# не отправлялась, потому что раньше в её чате произошла ошибка
+SendResult = dict[str, Any] | Exception | None
+
+
+def is_safe_to_retry(error: Exception) -> bool:
+    """Повтор безопасен, только если публикация точно не попала в чат."""
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, TelegramNetworkError):
+        return not error.request_sent
+    if isinstance(error, TelegramClientError):
+        return (
+            error.retry_after is not None
+            or (error.status_code or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+    return False
+
+
+class OutboxDispatcher:
+    """Отправляет публикации из outbox_messages в Telegram.
+
+    Циклы пишут публикации в outbox в одной транзакции с состоянием, а
+    диспетчер забирает их пачками в аренду, рассылает без открытой
+    транзакции и одним коммитом записывает id отправленных сообщений.
+    Пока пачка рассылается, аренда продлевается: лимит Telegram на чат
+    может растянуть отправку дольше одного срока аренды.
+    Чаты обслуживаются параллельно, а публикации одного чата строго по
+    порядку: после ошибки остаток чата ждёт следующего прохода. Повтор
+    выполняется, только если Telegram точно не получил запрос; иначе
+    публикация помечается failed, чтобы не задвоить пост.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        telegram_client: AsyncTelegramClient,
+        settings: OutboxSettings,
+    ):
+        self.session_maker = session_maker
+        self.telegram_client = telegram_client
+        self.retry_policy = RetryPolicy(
+            max_attempts=settings.max_attempts,
+            base_delay=settings.retry_delay,
+            max_delay=settings.max_retry_delay,
+        )
+        self.batch_size = settings.batch_size
+        self.poll_interval = settings.poll_interval
+        self.lease = timedelta(seconds=settings.lease)
+
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("Outbox dispatcher started")
+        while not self._stopping.is_set():
+            try:
+                dispatched = await self.dispatch_batch()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                dispatched = 0
+            # Полная пачка — значит, очередь не разобрана до конца
+            if dispatched < self.batch_size:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._stopping.wait(),
+                        timeout=self.poll_interval,
+                    )
+        logger.info("Outbox dispatcher stopped")
+
+    async def dispatch_batch(self) -> int:
+        async with self.session_maker() as session, session.begin():
+            batch = await OutboxRepository(session=session).claim_batch(
+                limit=self.batch_size,
+                lease=self.lease,
+            )
+        if not batch:
+            return 0
+
+        chats: dict[str, list[OutboxMessage]] = defaultdict(list)
+        for message in batch:
+            chats[message.chat_id].append(message)
+        heartbeat = asyncio.create_task(
+            self._heartbeat(outbox_ids=[message.id for message in batch]),
+        )
+        try:
+            results = await asyncio.gather(
+                *(self._send_chat(messages) for messages in chats.values()),
+            )
+        finally:
+            heartbeat.cancel()
+
+        async with self.session_maker() as session, session.begin():
+            outbox_repo = OutboxRepository(session=session)
+            message_repo = MessageRepository(session=session)
+            for messages, chat_results in zip(
+                chats.values(),
+                results,
+                strict=True,
+            ):
+                for message, result in zip(
+                    messages,
+                    chat_results,
+                    strict=True,
+                ):
+                    await self._record(
+                        outbox_repo=outbox_repo,
+                        message_repo=message_repo,
+                        message=message,
+                        result=result,
+                    )
+        logger.info(f"Dispatched {len(batch)} outbox messages")
+        return len(batch)
+
+    async def _heartbeat(self, outbox_ids: list[int]) -> None:
+        """Продлевает аренду пачки, чтобы её не забрал другой диспетчер."""
+        interval = self.lease.total_seconds() / LEASE_HEARTBEATS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self.session_maker() as session, session.begin():
+                    await OutboxRepository(session=session).extend_lease(
+                        outbox_ids=outbox_ids,
+                        lease=self.lease,
+                    )
+            except Exception:
+                logger.exception("Failed to extend outbox batch lease")
+
+    async def _send_chat(
+        self,
+        messages: list[OutboxMessage],
+    ) -> list[SendResult]:
+        results: list[SendResult] = []
+        for message in messages:
+            try:
+                results.append(
+                    await OUTBOX_SENDERS[message.method](
+                        self.telegram_client,
+                        chat_id=message.chat_id,
+                        priority=Priority(message.priority),
+                        **message.payload,
+                    ),
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Outbox message {message.id} to chat "
+                    f"{message.chat_id} failed: {e}",
+                )
+                results.append(e)
+                break
+        return results + [None] * (len(messages) - len(results))
+
+    async def _record(
+        self,
+        outbox_repo: OutboxRepository,
+        message_repo: MessageRepository,
+        message: OutboxMessage,
+        result: SendResult,
+    ) -> None:
+        if result is None:
+            await outbox_repo.release(outbox_ids=[message.id])
+        elif isinstance(result, Exception):
+            attempt = message.attempts + 1
+            if (
+                attempt < self.retry_policy.max_attempts
+                and is_safe_to_retry(result)
+            ):
+                await outbox_repo.mark_retry(
+                    outbox_id=message.id,
+                    error=repr(result),
+                    delay=timedelta(
+                        seconds=self.retry_policy.backoff(attempt),
+                    ),
+                )
+            else:
+                logger.error(
+                    f"Outbox message {message.id} ({message.method} for "
+                    f"state {message.state_id}) dead-lettered after "
+                    f"{attempt} attempts, later publications of the state "
+                    f"are held: {result}",
+                )
+                await outbox_repo.mark_failed(
+                    outbox_id=message.id,
+                    error=repr(result),
+                )
+        else:
+            await outbox_repo.mark_sent(
+                outbox_id=message.id,
+                message_id=result["message_id"],
+            )
+            if message.message_type is not None:
+                await message_repo.add_message(
+                    m_type=message.message_type,
+                    message_id=result["message_id"],
+                    state_id=message.state_id,
+                )
@@ -1,8 +1,9 @@
 from typing import Any
 
-from core.infra.db.models.poll import Poll, PollResult
+from core.infra.db.models.poll import Poll
 from core.infra.repositories.poll import PollRepository
-from core.integrations.telegram import TelegramClient
+from core.integrations.rate_limiter import Priority
+from core.integrations.telegram import AsyncTelegramClient
 from core.schemas import BaseState
 
 
@@ -10,63 +11,66 @@ class PollManager:
     def __init__(
         self,
         poll_repository: PollRepository,
-        telegram_client: TelegramClient,
+        telegram_client: AsyncTelegramClient,
 
     ):
         self.poll_repository = poll_repository
         self.telegram_client = telegram_client
 
-    def add_poll_from_state(
-        self,
-        state: BaseState,
-    ) -> Poll:
-        return self.poll_repository.add_poll(
+    def build_poll_from_state(self, state: BaseState) -> Poll:
+        return self.poll_repository.build_poll(
             question=state.question,
             options=state.options,
-            state_id=state.id,
         )
-    
-    def get_poll_by_state_id(
-        self,
-        state_id: int,
-    ) -> Poll | None:
-        return self.poll_repository.get_poll_by_state_id(state_id=state_id)
 
-    def get_poll_results(
+    async def get_poll_results(
         self,
         chat_id: int,
         message_id: int,
     ) -> dict[str, Any]:
-        poll_object = self.telegram_client.stop_poll(
+        poll_object = await self.telegram_client.stop_poll(
             chat_id=chat_id,
             message_id=message_id,
+            priority=Priority.HIGH,
         )
         return poll_object["options"]
 
-    def add_poll_results(
+    async def stop_poll(
         self,
-        poll_id: int,
-        results: dict[str, Any],
-    ) -> PollResult:
-        return self.poll_repository.add_poll_results(
-            poll_id=poll_id,
+        poll: Poll,
+        chat_id: int,
+        message_id: int,
+    ) -> list[dict[str, Any]]:
+        """Останавливает опрос в Telegram, не трогая базу.
+
+        Вызывается вне транзакции: stopPoll может ждать лимитов и
+        повторов. Если итоги уже сохранены, опрос закрыт раньше и они
+        просто возвращаются.
+        """
+        if poll.result is not None:
+            return poll.result.results
+        return await self.get_poll_results(
+            chat_id=chat_id,
+            message_id=message_id,
+        )
+
+    async def save_poll_results(
+        self,
+        poll: Poll,
+        results: list[dict[str, Any]],
+    ) -> bool:
+        return await self.poll_repository.save_poll_results(
+            poll=poll,
             results=results,
         )
 
-    def get_winning_poll_option(
+    async def get_winning_poll_option(
         self,
         poll_id: int,
     ) -> dict[str, str] | None:
-        poll_results = self.poll_repository.get_poll_results(poll_id=poll_id)
-        if not poll_results:
-            return None
-
-        win_option = max(
-            poll_results.results,
-            key=lambda option: option["voter_count"],
-        )
-        poll_option = self.poll_repository.get_poll_option_by_text(
+        poll_option = await self.poll_repository.get_winning_option(
             poll_id=poll_id,
-            text=win_option["text"],
         )
+        if poll_option is None:
+            return None
         return {"text": poll_option.text, "effect": poll_option.effect}
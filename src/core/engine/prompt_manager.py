@@ -1,6 +1,10 @@
+import hashlib
 import logging
 
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 import yaml
@@ -20,6 +24,21 @@ class PromptRenderError(PromptManagerError):
     """Custom exception for errors related to rendering prompts."""
 
 
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """Промпт, разделённый на статическую и динамическую части.
+
+    system_instruction одинакова для всех вызовов сценария и может
+    кэшироваться на стороне Gemini, contents — данные конкретного вызова.
+    """
+    system_instruction: str
+    contents: str
+
+    @property
+    def text(self) -> str:
+        return f"{self.contents}\n\n{self.system_instruction}"
+
+
 class PromptManager:
     def __init__(
         self,
@@ -27,7 +46,7 @@ class PromptManager:
         prompt_filename: str = "prompt.yaml",
     ):
         self.prompt_file_path = dir_path / prompt_filename
-        self._base_context = self._load_base_context()
+        self._base_context, self.version = self._load_base_context()
 
     def _validate_base_context(self, ctx: dict[str, str]) -> None:
         if not isinstance(ctx, dict):
@@ -40,16 +59,15 @@ class PromptManager:
                 f"{self.prompt_file_path}",
             )
 
-    def _load_base_context(self) -> dict[str, Any]:
+    def _load_base_context(self) -> tuple[Mapping[str, Any], str]:
         if not self.prompt_file_path.is_file():
             msg = f"Prompt file not found: {self.prompt_file_path}"
             logger.error(msg)
             raise PromptLoadError(msg)
 
         try:
-            ctx = yaml.safe_load(
-                self.prompt_file_path.read_text(encoding="utf-8"),
-            )
+            text = self.prompt_file_path.read_text(encoding="utf-8")
+            ctx = yaml.safe_load(text)
 
         except yaml.YAMLError as e:
             msg = f"Error parsing YAML file {self.prompt_file_path}: {e}"
@@ -61,14 +79,16 @@ class PromptManager:
             raise PromptLoadError(msg)
         else:
             self._validate_base_context(ctx=ctx)
-            return ctx
+            version = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            return MappingProxyType(ctx), version
 
-    def get_base_context(self) -> dict[str, Any]:
-        return self._base_context.copy()
+    def get_base_context(self) -> Mapping[str, Any]:
+        """Неизменяемый базовый контекст; копировать его не нужно."""
+        return self._base_context
 
     def update_context(
         self,
-        base_context: dict[str, Any],
+        base_context: Mapping[str, Any],
         new_values: dict[str, Any],
     ) -> dict[str, Any]:
         if not isinstance(new_values, dict):
@@ -76,10 +96,10 @@ class PromptManager:
                 "update_context: new_values not a dict, "
                 "returning base_context copy",
             )
-            return base_context.copy()
+            return dict(base_context)
         return {**base_context, **new_values}
 
-    def render_prompt(self, context: dict[str, Any]) -> str:
+    def render_prompt(self, context: Mapping[str, Any]) -> str:
         prompt = context.get("prompt")
         if not prompt or not isinstance(prompt, str):
             raise PromptRenderError(
@@ -90,3 +110,81 @@ class PromptManager:
         if extras:
             return "\n\n".join([*extras, prompt])
         return prompt
+
+    def render_split_prompt(
+        self,
+        context: Mapping[str, Any],
+    ) -> RenderedPrompt:
+        """Рендерит значения из prompt.yaml как system instruction.
+
+        Всё, что было добавлено или изменено через update_context,
+        попадает в contents.
+        """
+        static = {
+            k: v
+            for k, v in context.items()
+            if k in self._base_context and self._base_context[k] == v
+        }
+        dynamic = [f"{k}: {v}" for k, v in context.items() if k not in static]
+        return RenderedPrompt(
+            system_instruction=self.render_prompt(context=static),
+            contents="\n\n".join(dynamic),
+        )
+
+
+@dataclass(frozen=True)
+class _RegistryEntry:
+    signature: tuple[int, int] | None
+    manager: PromptManager
+
+
+class PromptRegistry:
+    """Общий для приложения кэш промптов сценариев.
+
+    prompt.yaml каждого сценария разбирается один раз. При каждом
+    обращении registry сверяет mtime и размер файла и перечитывает его,
+    если файл изменился, так что правки подхватываются без перезапуска.
+    Если новая версия не загрузилась, продолжает отдаваться предыдущая.
+    """
+
+    def __init__(self, prompt_filename: str = "prompt.yaml"):
+        self.prompt_filename = prompt_filename
+        self._entries: dict[Path, _RegistryEntry] = {}
+
+    def get(self, dir_path: Path) -> PromptManager:
+        signature = self._signature(dir_path / self.prompt_filename)
+        entry = self._entries.get(dir_path)
+        if entry is not None and entry.signature == signature:
+            return entry.manager
+
+        try:
+            manager = PromptManager(
+                dir_path=dir_path,
+                prompt_filename=self.prompt_filename,
+            )
+        except PromptLoadError:
+            if entry is None:
+                raise
+            logger.exception(
+                f"Keeping prompt version {entry.manager.version[:12]} "
+                f"for {dir_path}",
+            )
+            manager = entry.manager
+        else:
+            logger.info(
+                f"Loaded prompt for {dir_path} "
+                f"version {manager.version[:12]}",
+            )
+        self._entries[dir_path] = _RegistryEntry(
+            signature=signature,
+            manager=manager,
+        )
+        return manager
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
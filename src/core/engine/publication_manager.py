@@ -1,93 +1,80 @@
-from typing import Any
-
 from core.infra.db.models.message import Message
-from core.infra.repositories.message import MessageRepository
-from core.integrations.telegram import TelegramClient
+from core.infra.db.models.outbox import OutboxMessage
+from core.infra.db.models.scenario import ScenarioState
+from core.infra.repositories.outbox import OutboxRepository
+from core.integrations.rate_limiter import Priority
+from core.integrations.telegram import validate_poll
 from core.types import MessageType
 
 
 class PublicationManager:
-    def __init__(
-        self,
-        telegram_client: TelegramClient,
-        message_repository: MessageRepository,
-    ):
-        self.telegram_client = telegram_client
-        self.message_repo = message_repository
+    """Ставит публикации в outbox в текущей транзакции.
 
-    def publish_message(
-        self,
-        chat_id: int,
-        text: str,
-    ) -> dict[str, Any]:
-        return self.telegram_client.send_message(chat_id=chat_id, text=text)
+    Сами сообщения отправляет OutboxDispatcher после коммита, он же
+    записывает Message с id отправленных поста, опроса и новостей.
+    Повторно поставленная та же публикация отбрасывается outbox.
+    """
 
-    def publish_poll(
-        self,
-        chat_id: int,
-        question: str,
-        options: list[str],
-    ) -> dict[str, Any]:
-        return self.telegram_client.send_poll(
-            chat_id=chat_id,
-            question=question,
-            options=options,
-        )
+    def __init__(self, outbox_repository: OutboxRepository):
+        self.outbox_repo = outbox_repository
 
-    def publish_state(
+    async def enqueue_state(
         self,
         state_id: int,
-        chat_id: int,
+        chat_id: int | str,
         text: str,
         question: str,
         options: list[str],
-    ) -> tuple[dict[str, Any], dict[str, Any]]:
-        message = self.publish_message(chat_id=chat_id, text=text)
-        poll = self.publish_poll(
-            chat_id=chat_id,
-            question=question,
-            options=options,
-        )
-        self.add_state_message(
-            state_id=state_id,
-            message_id=message["message_id"],
+    ) -> None:
+        validate_poll(question=question, options=options)
+        await self.outbox_repo.add_message(
+            OutboxMessage(
+                chat_id=str(chat_id),
+                method="sendMessage",
+                payload={"text": text},
+                priority=Priority.HIGH,
+                state_id=state_id,
+                message_type=MessageType.STATE,
+            ),
         )
-        self.add_poll_message(
-            state_id=state_id,
-            message_id=poll["message_id"],
+        await self.outbox_repo.add_message(
+            OutboxMessage(
+                chat_id=str(chat_id),
+                method="sendPoll",
+                payload={"question": question, "options": options},
+                priority=Priority.HIGH,
+                state_id=state_id,
+                message_type=MessageType.POLL,
+            ),
         )
-        return message, poll
 
-    def publish_news(
-        self,
-        chat_id: int,
-        text: str,
-    ) -> None:
-        self.telegram_client.send_message(chat_id=chat_id, text=text)
-
-    def add_state_message(
+    async def enqueue_news(
         self,
         state_id: int,
-        message_id: int,
-    ) -> None:
-        self.message_repo.add_message(
-            m_type=MessageType.STATE,
-            message_id=message_id,
-            state_id=state_id,
+        chat_id: int | str,
+        text: str,
+    ) -> bool:
+        outbox_id = await self.outbox_repo.add_message(
+            OutboxMessage(
+                chat_id=str(chat_id),
+                method="sendMessage",
+                payload={"text": text},
+                priority=Priority.LOW,
+                state_id=state_id,
+                message_type=MessageType.NEWS,
+            ),
         )
+        return outbox_id is not None
 
-    def add_poll_message(
+    async def get_failed_publications(
         self,
         state_id: int,
-        message_id: int,
-    ) -> None:
-        self.message_repo.add_message(
-            m_type=MessageType.POLL,
-            message_id=message_id,
-            state_id=state_id,
-        )
+    ) -> list[OutboxMessage]:
+        return await self.outbox_repo.get_failed_messages(state_id=state_id)
 
-    def get_poll_message_by_state_id(self, state_id: int) -> Message | None:
-        return self.message_repo.get_poll_message_by_state_id(
-            state_id=state_id,
-        )
+    @staticmethod
+    def find_poll_message(record: ScenarioState) -> Message | None:
+        for message in record.messages:
+            if message.type == MessageType.POLL:
+                return message
+        return None
@@ -1,113 +1,793 @@
+import asyncio
 import logging
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from core.engine.context_builder import ContextBuilder
+from core.engine.cycle_run_manager import CycleRunManager
+from core.engine.memory_manager import MemoryManager
 from core.engine.poll_manager import PollManager
+from core.engine.prompt_manager import RenderedPrompt
 from core.engine.publication_manager import PublicationManager
-from core.engine.state_manager import StateManager
+from core.engine.state_manager import StaleStateError, StateManager
+from core.infra.db.models.cycle_run import CycleRun
+from core.infra.db.models.message import Message
+from core.infra.db.models.scenario import ScenarioState
 from core.infra.db.transaction_manager import TransactionManager
+from core.integrations.telegram import validate_poll
 from core.interfaces import ScenarioProtocol
+from core.schemas import BaseState
+from core.types import CycleStage, CycleType
 
 logger = logging.getLogger(__name__)
 
+LLM_TEMPERATURE = 0.95
+
+
+@dataclass(frozen=True)
+class ScenarioDataManagers:
+    """Менеджеры состояний, опросов, публикаций и памяти сценария."""
+
+    state: StateManager
+    poll: PollManager
+    publication: PublicationManager
+    memory: MemoryManager
+
+
 class ScenarioManager:
     def __init__(
         self,
         scenario: ScenarioProtocol,
-        state_manager: StateManager,
-        poll_manager: PollManager,
-        publication_manager: PublicationManager,
+        managers: ScenarioDataManagers,
+        cycle_run_manager: CycleRunManager,
         transaction_manager: TransactionManager,
+        context_builder: ContextBuilder,
     ):
         self.scenario = scenario
-        self.state_mgr = state_manager
-        self.poll_mgr = poll_manager
-        self.pub_mgr = publication_manager
+        self.state_mgr = managers.state
+        self.poll_mgr = managers.poll
+        self.pub_mgr = managers.publication
+        self.memory_mgr = managers.memory
+        self.run_mgr = cycle_run_manager
         self.tr_mgr = transaction_manager
+        self.context_builder = context_builder
 
         self._scenario_settings = self.scenario.get_settings()
         self._scenario_name = self._scenario_settings.scenario_name
         self._chat_id = self._scenario_settings.tg_chat_id
 
-    def run_generation_cycle(self):
-        with self.tr_mgr:
-            latest_state = self.state_mgr.get_latest_state(
+    async def run_tick(self):
+        """Закрывает опрос и публикует следующее состояние за один проход.
+
+        Соединение из пула занято только в коротких транзакциях, а
+        вызовы Telegram и LLM идут между ними. Первая транзакция одним
+        запросом читает состояние с опросом, вариантами, итогами и id
+        сообщений. Затем опрос останавливается вне транзакции, и его
+        итоги коммитятся отдельно, чтобы не потерять их, если генерация
+        упадёт: закрытый опрос повторно не остановить. Следующая
+        транзакция выбирает победителя, забирает ключ запуска и читает
+        входные данные, поэтому повторный тик для того же опроса не
+        вызывает LLM. Генерация идёт без соединения, а последняя
+        транзакция записывает новое состояние, его опрос и публикации в
+        outbox; в чат их отправляет OutboxDispatcher.
+        """
+        async with self.tr_mgr:
+            record = await self.state_mgr.get_latest_state_record(
                 scenario_name=self._scenario_name,
+            )
+            poll_message = await self._find_poll_message(record=record)
+            if record is not None and poll_message is None:
+                return
+
+        previous_state = winning_option = None
+        if record is not None:
+            previous_state = self.state_mgr.to_schema(
+                record=record,
                 response_schema_cls=self.scenario.get_schema(),
             )
-            logger.info(f"latest_state: {latest_state}")
-            if not latest_state:
-                next_state_prompt = self.scenario.initialize_prompt()
+            await self._close_poll(record=record, poll_message=poll_message)
+
+        async with self.tr_mgr:
+            if record is not None:
+                winning_option = await self.poll_mgr.get_winning_poll_option(
+                    poll_id=record.poll.id,
+                )
+                if winning_option is None:
+                    return
+            run = await self._claim_generation(
+                previous_state=previous_state,
+                chosen_option=winning_option,
+            )
+            if run is None:
+                return
+            candidate, memory = await self._read_generation_inputs(
+                previous_state=previous_state,
+                chosen_option=winning_option,
+            )
+
+        await self._publish_next_state(
+            run=run,
+            previous_state=previous_state,
+            chosen_option=winning_option,
+            candidate=candidate,
+            memory=memory,
+        )
+
+    async def _find_poll_message(
+        self,
+        record: ScenarioState | None,
+    ) -> Message | None:
+        """Сообщение с опросом состояния или None, если его нет в чате."""
+        if record is None:
+            return None
+        poll_message = self.pub_mgr.find_poll_message(record=record)
+        if record.poll is None or poll_message is None:
+            await self._report_unpublished_poll(record=record)
+            return None
+        return poll_message
+
+    async def _close_poll(
+        self,
+        record: ScenarioState,
+        poll_message: Message,
+    ) -> None:
+        """Останавливает опрос вне транзакции и коммитит его итоги.
+
+        record прочитан в уже закрытой транзакции, поэтому соединение
+        не держится, пока stopPoll ждёт лимитов Telegram и повторов.
+        """
+        results = await self.poll_mgr.stop_poll(
+            poll=record.poll,
+            chat_id=self._chat_id,
+            message_id=poll_message.message_id,
+        )
+        logger.info(f"poll_results: {results}")
+        if record.poll.result is not None:
+            return
+        async with self.tr_mgr:
+            if not await self.poll_mgr.save_poll_results(
+                poll=record.poll,
+                results=results,
+            ):
+                logger.info(
+                    f"Results of poll {record.poll.id} are already saved",
+                )
+
+    async def _report_unpublished_poll(self, record: ScenarioState) -> None:
+        """Сообщает, почему у состояния нет опроса в чате.
+
+        Если публикация состояния упала окончательно, сценарий стоит,
+        пока её не отправят заново, и об этом пишется ошибка.
+        """
+        failed = await self.pub_mgr.get_failed_publications(
+            state_id=record.id,
+        )
+        if failed:
+            logger.error(
+                f"State {record.id} is stuck: publications "
+                f"{[message.id for message in failed]} failed permanently "
+                f"({failed[0].error}), its poll will not be published "
+                f"until they are requeued",
+            )
+        else:
+            logger.warning(f"State {record.id} has no published poll yet")
+
+    async def run_generation_cycle(self):
+        """Публикует состояние для победившей опции закрытого опроса.
+
+        Фазы те же, что у run_tick: чтение в короткой транзакции,
+        генерация вне её и запись во второй короткой транзакции.
+        """
+        async with self.tr_mgr:
+            record = await self.state_mgr.get_latest_state_record(
+                scenario_name=self._scenario_name,
+            )
+            if record is None:
+                previous_state = winning_option = None
             else:
-                poll = self.poll_mgr.get_poll_by_state_id(
-                    state_id=latest_state.id,
+                previous_state = self.state_mgr.to_schema(
+                    record=record,
+                    response_schema_cls=self.scenario.get_schema(),
                 )
-                winning_poll_option = self.poll_mgr.get_winning_poll_option(
-                    poll_id=poll.id,
+                logger.info(f"latest_state: {previous_state}")
+                if record.poll is None:
+                    await self._report_unpublished_poll(record=record)
+                    return
+                winning_option = await self.poll_mgr.get_winning_poll_option(
+                    poll_id=record.poll.id,
                 )
-                if winning_poll_option is None:
+                if winning_option is None:
                     return
+            run = await self._claim_generation(
+                previous_state=previous_state,
+                chosen_option=winning_option,
+            )
+            if run is None:
+                return
+            candidate, memory = await self._read_generation_inputs(
+                previous_state=previous_state,
+                chosen_option=winning_option,
+            )
+
+        await self._publish_next_state(
+            run=run,
+            previous_state=previous_state,
+            chosen_option=winning_option,
+            candidate=candidate,
+            memory=memory,
+        )
+
+    async def _claim_generation(
+        self,
+        previous_state: BaseState | None,
+        chosen_option: dict[str, Any] | None,
+    ) -> CycleRun | None:
+        """Забирает запуск генерации и отмечает этап выбора варианта."""
+        parent_id = None if previous_state is None else previous_state.id
+        run = await self._claim_run(
+            state_id=parent_id,
+            cycle=CycleType.GENERATION,
+        )
+        if run is not None and run.stage is None:
+            await self.run_mgr.checkpoint(
+                scenario_name=self._scenario_name,
+                state_id=parent_id,
+                cycle=CycleType.GENERATION,
+                stage=CycleStage.WINNER_RESOLVED,
+                data={"option": chosen_option},
+            )
+        return run
+
+    async def _claim_run(
+        self,
+        state_id: int | None,
+        cycle: CycleType,
+    ) -> CycleRun | None:
+        run = await self.run_mgr.claim(
+            scenario_name=self._scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+        )
+        if run is None:
+            logger.info(
+                f"{cycle} cycle for state {state_id} is already done "
+                f"or running, skipping",
+            )
+        elif run.attempts > 1:
+            logger.info(
+                f"Resuming {cycle} cycle for state {state_id} "
+                f"from stage {run.stage} (attempt {run.attempts})",
+            )
+        return run
+
+    async def _complete_run(self, state_id: int | None, cycle: CycleType):
+        await self.run_mgr.complete(
+            scenario_name=self._scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+        )
+
+    @asynccontextmanager
+    async def _failing_run(
+        self,
+        state_id: int | None,
+        cycle: CycleType,
+    ) -> AsyncIterator[None]:
+        """Отмечает запуск упавшим, чтобы следующий мог его повторить."""
+        try:
+            yield
+        except BaseException as e:
+            try:
+                async with self.tr_mgr:
+                    await self.run_mgr.fail(
+                        scenario_name=self._scenario_name,
+                        state_id=state_id,
+                        cycle=cycle,
+                        error=repr(e),
+                    )
+            except Exception:
+                logger.exception(f"Failed to record {cycle} cycle failure")
+            raise
+
+    async def _read_generation_inputs(
+        self,
+        previous_state: BaseState | None,
+        chosen_option: dict[str, Any] | None,
+    ) -> tuple[BaseState | None, str | None]:
+        """Читает спекулятивного кандидата и память для генерации."""
+        memory = await self.memory_mgr.get_summary(
+            scenario_name=self._scenario_name,
+        )
+        if previous_state is None:
+            return None, memory
+        candidate = await self.state_mgr.get_candidate(
+            state_id=previous_state.id,
+            option_text=chosen_option["text"],
+            response_schema_cls=self.scenario.get_schema(),
+        )
+        return candidate, memory
 
-                logger.info(f"winning_poll_option: {winning_poll_option}")
-                next_state_prompt = self.scenario.next_state_prompt(
-                    previous_state=latest_state,
-                    chosen_option=winning_poll_option,
+    async def _publish_next_state(
+        self,
+        run: CycleRun,
+        previous_state: BaseState | None,
+        chosen_option: dict[str, Any] | None,
+        candidate: BaseState | None,
+        memory: str | None,
+    ) -> None:
+        """Генерирует состояние без соединения, затем пишет его и outbox.
+
+        Запись проверяет, что previous_state всё ещё последнее состояние
+        сценария; если другой процесс успел записать своё, транзакция
+        откатывается вместе с публикациями, и в чат ничего не уходит.
+        Запуск генерации отмечается выполненным в той же транзакции.
+
+        Сгенерированное состояние сначала сохраняется в checkpoint
+        запуска: если запись не удалась, следующий запуск возьмёт его
+        оттуда, не вызывая LLM. Отправку поста и опроса после записи
+        отслеживает outbox, поэтому готовые публикации не повторяются.
+        При стриминге состояние пишется ещё до конца генерации, см.
+        _stream_next_state.
+        """
+        parent_id = None if previous_state is None else previous_state.id
+        async with self._failing_run(
+            state_id=parent_id,
+            cycle=CycleType.GENERATION,
+        ):
+            next_state = self._restore_next_state(run=run)
+            if (
+                next_state is None
+                and candidate is None
+                and self._scenario_settings.stream_generation
+            ):
+                await self._stream_next_state(
+                    parent_id=parent_id,
+                    prompt=self._next_state_prompt(
+                        previous_state=previous_state,
+                        chosen_option=chosen_option,
+                        memory=memory,
+                    ),
+                )
+                return
+            if next_state is None:
+                next_state = await self._build_next_state(
+                    previous_state=previous_state,
+                    chosen_option=chosen_option,
+                    candidate=candidate,
+                    memory=memory,
+                )
+                # Кандидат спекуляции уже сохранён в state_candidates
+                if candidate is None:
+                    await self._checkpoint_next_state(
+                        parent_id=parent_id,
+                        chosen_option=chosen_option,
+                        next_state=next_state,
+                    )
+            if not await self._write_next_state(
+                parent_id=parent_id,
+                next_state=next_state,
+            ):
+                return
+        logger.info(f"next_state: {next_state}")
+
+    async def _write_next_state(
+        self,
+        parent_id: int | None,
+        next_state: BaseState,
+    ) -> bool:
+        """Пишет состояние, его опрос и outbox и закрывает запуск.
+
+        Возвращает False, если после parent_id уже записано другое
+        состояние: тогда next_state отбрасывается.
+        """
+        try:
+            async with self.tr_mgr:
+                await self.state_mgr.add_next_state(
+                    scenario_name=self._scenario_name,
+                    parent_id=parent_id,
+                    state=next_state,
+                    poll=self.poll_mgr.build_poll_from_state(
+                        state=next_state,
+                    ),
+                )
+                await self._enqueue_state(state=next_state)
+                if parent_id is not None:
+                    await self.state_mgr.discard_candidates(
+                        state_id=parent_id,
+                    )
+                await self._complete_run(
+                    state_id=parent_id,
+                    cycle=CycleType.GENERATION,
+                )
+        except StaleStateError as e:
+            logger.warning(f"{e}; discarding generated state")
+            async with self.tr_mgr:
+                await self._complete_run(
+                    state_id=parent_id,
+                    cycle=CycleType.GENERATION,
                 )
-            next_state = self.state_mgr.create_next_state(
+            return False
+        return True
+
+    def _restore_next_state(self, run: CycleRun) -> BaseState | None:
+        checkpoint = self.run_mgr.get_checkpoint(
+            run=run,
+            stage=CycleStage.STATE_GENERATED,
+        )
+        if checkpoint is None:
+            return None
+        logger.info(
+            f"Restored next state after {run.state_id} from checkpoint",
+        )
+        return self.scenario.get_schema().model_validate(checkpoint["state"])
+
+    async def _checkpoint_next_state(
+        self,
+        parent_id: int | None,
+        chosen_option: dict[str, Any] | None,
+        next_state: BaseState,
+    ) -> None:
+        # Состояние с негодным опросом не сохраняется, иначе каждый
+        # следующий запуск падал бы на нём же
+        question, options = self.scenario.build_poll_payload(
+            state=next_state,
+        )
+        validate_poll(question=question, options=options)
+        async with self.tr_mgr:
+            await self.run_mgr.checkpoint(
                 scenario_name=self._scenario_name,
-                prompt=next_state_prompt,
-                response_schema_cls=self.scenario.get_schema(),
-                llm_temperature=0.95,
+                state_id=parent_id,
+                cycle=CycleType.GENERATION,
+                stage=CycleStage.STATE_GENERATED,
+                data={
+                    "option": chosen_option,
+                    "state": next_state.model_dump(),
+                },
             )
-            logger.info(f"next_state: {next_state}")
-            self.poll_mgr.add_poll_from_state(state=next_state)
-            post_text = self.scenario.build_post_content(
-                state=next_state,
+
+    async def _build_next_state(
+        self,
+        previous_state: BaseState | None,
+        chosen_option: dict[str, Any] | None,
+        candidate: BaseState | None,
+        memory: str | None,
+    ) -> BaseState:
+        if candidate is not None:
+            logger.info(
+                f"Using speculative candidate for option "
+                f"'{chosen_option['text']}'",
             )
-            question, options = self.scenario.build_poll_payload(
-                state=next_state,
+            return candidate
+        return await self.state_mgr.generate_state(
+            prompt=self._next_state_prompt(
+                previous_state=previous_state,
+                chosen_option=chosen_option,
+                memory=memory,
+            ),
+            response_schema_cls=self.scenario.get_schema(),
+            llm_temperature=LLM_TEMPERATURE,
+            scenario_name=self._scenario_name,
+            cycle=CycleType.GENERATION,
+        )
+
+    def _next_state_prompt(
+        self,
+        previous_state: BaseState | None,
+        chosen_option: dict[str, Any] | None,
+        memory: str | None,
+    ) -> RenderedPrompt:
+        if previous_state is None:
+            return self.scenario.initialize_prompt()
+        logger.info(f"winning_poll_option: {chosen_option}")
+        return self.scenario.next_state_prompt(
+            previous_state=previous_state,
+            chosen_option=chosen_option,
+            memory=memory,
+        )
+
+    async def _stream_next_state(
+        self,
+        parent_id: int | None,
+        prompt: RenderedPrompt,
+    ) -> None:
+        """Публикует пост и опрос, пока модель ещё дописывает новости.
+
+        Пост и опрос строятся из полей, которые приходят раньше
+        stream_last_fields схемы. Как только они готовы, состояние с
+        пустыми отложенными полями пишется через _write_next_state, и
+        диспетчер отправляет публикации, не дожидаясь конца потока.
+        Отложенные поля дописываются в состояние после потока; если он
+        оборвался, состояние остаётся без них, а цикл новостей его
+        пропускает.
+        """
+        schema = self.scenario.get_schema()
+        required = {
+            name
+            for name, field in schema.model_fields.items()
+            if field.is_required() and name not in schema.stream_last_fields
+        }
+        stream = self.state_mgr.stream_state(
+            prompt=prompt,
+            response_schema_cls=schema,
+            llm_temperature=LLM_TEMPERATURE,
+            scenario_name=self._scenario_name,
+            cycle=CycleType.GENERATION,
+        )
+        fields: dict[str, Any] = {}
+        try:
+            async for name, value in stream:
+                fields[name] = value
+                if required <= fields.keys():
+                    break
+            # Отложенные поля — списки, до конца потока они пустые
+            next_state = schema.model_validate(
+                {name: [] for name in schema.stream_last_fields} | fields,
+            )
+            if not await self._write_next_state(
+                parent_id=parent_id,
+                next_state=next_state,
+            ):
+                return
+            logger.info(
+                f"Published state {next_state.id} before stream completion",
             )
-            self.pub_mgr.publish_state(
+            try:
+                fields.update(
+                    {name: value async for name, value in stream},
+                )
+                full_state = schema.model_validate(fields)
+            except Exception:
+                logger.exception(
+                    f"Stream for state {next_state.id} broke off, the "
+                    f"state is left without {schema.stream_last_fields}",
+                )
+                return
+        finally:
+            await stream.aclose()
+        async with self.tr_mgr:
+            await self.state_mgr.update_state(
                 state_id=next_state.id,
-                chat_id=self._chat_id,
-                text=post_text,
-                question=question,
+                state=full_state,
+            )
+        full_state.id = next_state.id
+        logger.info(f"next_state: {full_state}")
+
+    async def _enqueue_state(self, state: BaseState) -> None:
+        question, options = self.scenario.build_poll_payload(state=state)
+        await self.pub_mgr.enqueue_state(
+            state_id=state.id,
+            chat_id=self._chat_id,
+            text=self.scenario.build_post_content(state=state),
+            question=question,
+            options=options,
+        )
+
+    async def run_speculation_cycle(self):
+        """Заранее генерирует следующее состояние для каждой опции опроса.
+
+        Генерация идёт вне транзакции, пока опрос открыт; готовые
+        кандидаты сохраняются одним коротким коммитом.
+        """
+        async with self.tr_mgr:
+            record = await self.state_mgr.get_latest_state_record(
+                scenario_name=self._scenario_name,
+            )
+            if record is None:
+                return
+            poll = record.poll
+            if poll is None or poll.result is not None:
+                return
+            latest_state = self.state_mgr.to_schema(
+                record=record,
+                response_schema_cls=self.scenario.get_schema(),
+            )
+            ready = await self.state_mgr.get_candidate_option_texts(
+                state_id=latest_state.id,
+            )
+            options = [
+                {"text": option.text, "effect": option.effect}
+                for option in poll.options
+                if option.text not in ready
+            ]
+            if not options:
+                return
+            if not await self._claim_run(
+                state_id=latest_state.id,
+                cycle=CycleType.SPECULATION,
+            ):
+                return
+            memory = await self.memory_mgr.get_summary(
+                scenario_name=self._scenario_name,
+            )
+
+        async with self._failing_run(
+            state_id=latest_state.id,
+            cycle=CycleType.SPECULATION,
+        ):
+            await self._speculate(
+                latest_state=latest_state,
                 options=options,
+                memory=memory,
             )
 
-    def run_poll_cycle(self):
-        with self.tr_mgr:
-            latest_state = self.state_mgr.get_latest_state(
+    async def _speculate(
+        self,
+        latest_state: BaseState,
+        options: list[dict[str, str]],
+        memory: str | None,
+    ) -> None:
+        candidates = await asyncio.gather(
+            *(
+                self.state_mgr.generate_state(
+                    prompt=self.scenario.next_state_prompt(
+                        previous_state=latest_state,
+                        chosen_option=option,
+                        memory=memory,
+                    ),
+                    response_schema_cls=self.scenario.get_schema(),
+                    llm_temperature=LLM_TEMPERATURE,
+                    scenario_name=self._scenario_name,
+                    cycle=CycleType.SPECULATION,
+                )
+                for option in options
+            ),
+            return_exceptions=True,
+        )
+        errors = []
+        async with self.tr_mgr:
+            for option, candidate in zip(options, candidates, strict=True):
+                if isinstance(candidate, BaseException):
+                    logger.warning(
+                        f"Speculative generation failed for option "
+                        f"'{option['text']}': {candidate}",
+                    )
+                    errors.append(repr(candidate))
+                    continue
+                await self.state_mgr.add_candidate(
+                    state_id=latest_state.id,
+                    option_text=option["text"],
+                    candidate=candidate,
+                )
+            # Запуск с ошибками остаётся failed: следующий догенерирует
+            # недостающих кандидатов
+            if errors:
+                await self.run_mgr.fail(
+                    scenario_name=self._scenario_name,
+                    state_id=latest_state.id,
+                    cycle=CycleType.SPECULATION,
+                    error="; ".join(errors),
+                )
+            else:
+                await self._complete_run(
+                    state_id=latest_state.id,
+                    cycle=CycleType.SPECULATION,
+                )
+        logger.info(
+            f"Speculated {len(options)} candidates for state "
+            f"{latest_state.id}",
+        )
+
+    async def run_memory_cycle(self):
+        """Дописывает последнее состояние в долговременную память.
+
+        Как и спекуляция, вызов LLM идёт между двумя короткими
+        транзакциями. Готовая летопись сразу сохраняется в checkpoint
+        запуска, и повтор после сбоя записи не вызывает LLM заново.
+        """
+        async with self.tr_mgr:
+            latest_state = await self.state_mgr.get_latest_state(
                 scenario_name=self._scenario_name,
                 response_schema_cls=self.scenario.get_schema(),
             )
             if not latest_state:
                 return
-            poll = self.poll_mgr.get_poll_by_state_id(
-                state_id=latest_state.id,
+            memory = await self.memory_mgr.get_memory(
+                scenario_name=self._scenario_name,
             )
-            poll_message = self.pub_mgr.get_poll_message_by_state_id(
+            if memory is not None and memory.state_id == latest_state.id:
+                return
+            run = await self._claim_run(
                 state_id=latest_state.id,
+                cycle=CycleType.MEMORY,
             )
-            poll_results = self.poll_mgr.get_poll_results(
-                chat_id=self._chat_id,
-                message_id=poll_message.message_id,
+            if run is None:
+                return
+            summary = None if memory is None else memory.summary
+
+        async with self._failing_run(
+            state_id=latest_state.id,
+            cycle=CycleType.MEMORY,
+        ):
+            checkpoint = self.run_mgr.get_checkpoint(
+                run=run,
+                stage=CycleStage.SUMMARY_GENERATED,
             )
-            logger.info(f"poll_results: {poll_results}")
-            self.poll_mgr.add_poll_results(
-                poll_id=poll.id,
-                results=poll_results,
+            if checkpoint is not None:
+                new_summary = checkpoint["summary"]
+            else:
+                new_summary = await self.memory_mgr.summarize(
+                    scenario_name=self._scenario_name,
+                    summary=summary,
+                    state_context=self.context_builder.build(
+                        latest_state,
+                        fields=self.scenario.context_fields,
+                    ),
+                    max_chars=self._scenario_settings.memory_max_chars,
+                )
+                async with self.tr_mgr:
+                    await self.run_mgr.checkpoint(
+                        scenario_name=self._scenario_name,
+                        state_id=latest_state.id,
+                        cycle=CycleType.MEMORY,
+                        stage=CycleStage.SUMMARY_GENERATED,
+                        data={"summary": new_summary},
+                    )
+            async with self.tr_mgr:
+                await self.memory_mgr.save_summary(
+                    scenario_name=self._scenario_name,
+                    summary=new_summary,
+                    state_id=latest_state.id,
+                )
+                await self._complete_run(
+                    state_id=latest_state.id,
+                    cycle=CycleType.MEMORY,
+                )
+        logger.info(
+            f"Memory updated with state {latest_state.id} "
+            f"({len(new_summary)} chars)",
+        )
+
+    async def run_poll_cycle(self):
+        """Закрывает опрос последнего состояния и сохраняет итоги.
+
+        Как и в run_tick, stopPoll вызывается между транзакциями.
+        """
+        async with self.tr_mgr:
+            record = await self.state_mgr.get_latest_state_record(
+                scenario_name=self._scenario_name,
             )
+            poll_message = await self._find_poll_message(record=record)
+        if poll_message is None:
+            return
+        await self._close_poll(record=record, poll_message=poll_message)
+
+    async def run_news_cycle(self):
+        """Ставит в outbox новости последнего состояния, один раз на него.
 
-    def run_news_cycle(self):
-        with self.tr_mgr:
-            latest_state = self.state_mgr.get_latest_state(
+        Ключ запуска и публикация пишутся одной транзакцией, поэтому
+        повторный запуск для того же состояния ничего не отправляет.
+        """
+        async with self.tr_mgr:
+            latest_state = await self.state_mgr.get_latest_state(
                 scenario_name=self._scenario_name,
                 response_schema_cls=self.scenario.get_schema(),
             )
-            print(f"latest_state: {latest_state}")
-            news = latest_state.news
+            if not latest_state:
+                return
+            if not latest_state.news:
+                # Новости ещё дописываются стримингом или не сгенерированы
+                logger.info(f"State {latest_state.id} has no news yet")
+                return
+            if not await self._claim_run(
+                state_id=latest_state.id,
+                cycle=CycleType.NEWS,
+            ):
+                return
+            logger.debug(f"latest_state: {latest_state}")
             news_text = self.scenario.build_news_content(state=latest_state)
-            print(f"news: {news}")
-            self.pub_mgr.publish_news(
+            logger.debug(f"news: {latest_state.news}")
+            if not await self.pub_mgr.enqueue_news(
+                state_id=latest_state.id,
                 chat_id=self._chat_id,
                 text=news_text,
+            ):
+                logger.info(
+                    f"News for state {latest_state.id} is already queued",
+                )
+            await self._complete_run(
+                state_id=latest_state.id,
+                cycle=CycleType.NEWS,
             )
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import suppress
+from datetime import timedelta
+
+from dishka import AsyncContainer
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config.scenarios import ScenarioSettings
+from core.config.settings import SchedulerSettings
+from core.engine.scenario_manager import ScenarioManager
+from core.infra.db.models.scenario_job import ScenarioJob
+from core.infra.repositories.scenario_job import ScenarioJobRepository
+from core.types import CycleType
+
+logger = logging.getLogger(__name__)
+
+CYCLE_RUNNERS: dict[
+    CycleType,
+    Callable[[ScenarioManager], Awaitable[None]],
+] = {
+    CycleType.TICK: ScenarioManager.run_tick,
+    CycleType.POLL: ScenarioManager.run_poll_cycle,
+    CycleType.GENERATION: ScenarioManager.run_generation_cycle,
+    CycleType.MEMORY: ScenarioManager.run_memory_cycle,
+    CycleType.SPECULATION: ScenarioManager.run_speculation_cycle,
+    CycleType.NEWS: ScenarioManager.run_news_cycle,
+}
+
+# Во сколько раз аренда длиннее интервала её продления
+LEASE_HEARTBEATS = 3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ScenarioScheduler:
+    """Запускает циклы сценариев по расписаниям из таблицы scenario_jobs.
+
+    Каждое расписание сценария — строка scenario_jobs с next_run_at.
+    max_concurrency воркеров процесса забирают созревшие задачи через
+    SELECT … FOR UPDATE SKIP LOCKED и держат их в аренде, продлевая её,
+    пока циклы выполняются. Циклы одного сценария не идут параллельно
+    ни в одном процессе, поэтому процессов можно запускать сколько
+    угодно, в том числе на разных машинах. Задачи упавшего процесса
+    забирают другие после истечения аренды, а воркер, потерявший
+    аренду, прерывает свои циклы.
+
+    Аренду держит конкретный воркер: его id — worker_id процесса с
+    номером воркера.
+    """
+
+    def __init__(
+        self,
+        container: AsyncContainer,
+        session_maker: async_sessionmaker[AsyncSession],
+        scenarios: Sequence[ScenarioSettings],
+        settings: SchedulerSettings,
+        worker_id: str | None = None,
+    ):
+        self.container = container
+        self.session_maker = session_maker
+        self.scenarios = {
+            scenario.scenario_name: scenario for scenario in scenarios
+        }
+        self.settings = settings
+        self.worker_id = worker_id or default_worker_id()
+
+        self._lease = timedelta(seconds=settings.lease)
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        logger.info("Scheduler shutdown requested")
+        self._stopping.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        await self._sync_jobs()
+        workers = [
+            asyncio.create_task(
+                self._worker(worker_id=f"{self.worker_id}:{i}"),
+                name=f"worker-{i}",
+            )
+            for i in range(self.settings.max_concurrency)
+        ]
+        logger.info(
+            f"Scheduler {self.worker_id} started: "
+            f"{len(self.scenarios)} scenarios, {len(workers)} workers",
+        )
+        try:
+            await self._stopping.wait()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+            await self._shutdown(workers=workers)
+
+    async def _sync_jobs(self) -> None:
+        async with self.session_maker() as session, session.begin():
+            job_repo = ScenarioJobRepository(session=session)
+            for scenario in self.scenarios.values():
+                await job_repo.sync_jobs(
+                    scenario_name=scenario.scenario_name,
+                    schedules=[
+                        (
+                            list(schedule.cycles),
+                            schedule.interval,
+                            schedule.delay,
+                        )
+                        for schedule in scenario.schedules
+                    ],
+                )
+
+    async def _shutdown(self, workers: list[asyncio.Task]) -> None:
+        _, pending = await asyncio.wait(
+            workers,
+            timeout=self.settings.shutdown_timeout,
+        )
+        if pending:
+            logger.warning("Shutdown timeout reached, cancelling workers")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("Scheduler stopped")
+
+    async def _worker(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim(worker_id=worker_id)
+            except Exception:
+                logger.exception("Failed to claim a scenario job")
+                job = None
+            if job is None:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._stopping.wait(),
+                        timeout=self.settings.poll_interval,
+                    )
+                continue
+            await self._execute(job=job, worker_id=worker_id)
+
+    async def _claim(self, worker_id: str) -> ScenarioJob | None:
+        async with self.session_maker() as session, session.begin():
+            return await ScenarioJobRepository(session=session).claim_job(
+                scenario_names=list(self.scenarios),
+                worker_id=worker_id,
+                lease=self._lease,
+            )
+
+    async def _execute(self, job: ScenarioJob, worker_id: str) -> None:
+        cycles = asyncio.create_task(self._run_cycles(job))
+        heartbeat = asyncio.create_task(
+            self._heartbeat(job=job, worker_id=worker_id, cycles=cycles),
+        )
+        error = None
+        try:
+            await cycles
+        except asyncio.CancelledError:
+            # Heartbeat завершается сам, только когда аренда потеряна
+            lease_lost = heartbeat.done()
+            heartbeat.cancel()
+            if lease_lost and not asyncio.current_task().cancelling():
+                # Задача уже чужая: ни отдавать, ни завершать её нельзя
+                return
+            if not lease_lost:
+                # Прерванную задачу сразу отдаём другим воркерам
+                async with self.session_maker() as session, session.begin():
+                    await ScenarioJobRepository(session=session).release_job(
+                        job_id=job.id,
+                        worker_id=worker_id,
+                    )
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.scenario_name} {job.cycles} failed")
+            error = repr(e)
+        heartbeat.cancel()
+        async with self.session_maker() as session, session.begin():
+            await ScenarioJobRepository(session=session).complete_job(
+                job_id=job.id,
+                worker_id=worker_id,
+                error=error,
+            )
+
+    async def _run_cycles(self, job: ScenarioJob) -> None:
+        context = {ScenarioSettings: self.scenarios[job.scenario_name]}
+        async with self.container(context=context) as request:
+            sc_manager = await request.get(ScenarioManager)
+            for cycle in job.cycles:
+                logger.info(
+                    f"Running {cycle} cycle for {job.scenario_name}",
+                )
+                await CYCLE_RUNNERS[CycleType(cycle)](sc_manager)
+
+    async def _heartbeat(
+        self,
+        job: ScenarioJob,
+        worker_id: str,
+        cycles: asyncio.Task,
+    ) -> None:
+        """Продлевает аренду задачи, а потеряв её, прерывает циклы.
+
+        Аренду теряет воркер, который не успел её продлить: задачу к
+        этому времени может выполнять другой, и продолжать циклы нельзя.
+        """
+        while True:
+            await asyncio.sleep(self.settings.lease / LEASE_HEARTBEATS)
+            try:
+                async with self.session_maker() as session, session.begin():
+                    extended = await ScenarioJobRepository(
+                        session=session,
+                    ).extend_lease(
+                        job_id=job.id,
+                        worker_id=worker_id,
+                        lease=self._lease,
+                    )
+            except Exception:
+                logger.exception(f"Failed to extend lease of job {job.id}")
+                continue
+            if not extended:
+                logger.warning(
+                    f"Lost lease of job {job.scenario_name} {job.cycles}, "
+                    f"cancelling its cycles",
+                )
+                cycles.cancel()
+                return
@@ -1,79 +1,260 @@
 import logging
 
+from collections.abc import AsyncIterator, Sequence
 from typing import Any
 
+from sqlalchemy.exc import IntegrityError
+
+from core.engine.llm_cache import LLMResponseCache, make_cache_key
+from core.engine.llm_telemetry import LLMTelemetry
+from core.engine.prompt_manager import RenderedPrompt
+from core.infra.db.models.poll import Poll
 from core.infra.db.models.scenario import ScenarioState
+from core.infra.repositories.candidate import StateCandidateRepository
 from core.infra.repositories.scenario_state import ScenarioStateRepository
-from core.integrations.gemini import GeminiClient
+from core.integrations.gemini import AsyncGeminiClient
 from core.schemas import BaseState
+from core.types import CycleType
 
 logger = logging.getLogger(__name__)
 
 
+class StaleStateError(Exception):
+    """Raised when the latest state changed while the next one was built."""
+
+    def __init__(self, scenario_name: str, parent_id: int | None):
+        super().__init__(
+            f"Scenario '{scenario_name}' already has a state after "
+            f"{parent_id}",
+        )
+        self.scenario_name = scenario_name
+        self.parent_id = parent_id
+
 
 class StateManager:
     def __init__(
         self,
         state_repository: ScenarioStateRepository,
-        gemini_client: GeminiClient,
+        candidate_repository: StateCandidateRepository,
+        gemini_client: AsyncGeminiClient,
+        response_cache: LLMResponseCache,
+        telemetry: LLMTelemetry,
     ):
         self.state_repository = state_repository
+        self.candidate_repository = candidate_repository
         self.gemini_client = gemini_client
+        self.response_cache = response_cache
+        self.telemetry = telemetry
 
-    def generate_state(
+    async def generate_state(
         self,
-        prompt: str,
+        prompt: RenderedPrompt,
         response_schema_cls: type[BaseState],
         *,
         llm_temperature: float,
+        scenario_name: str,
+        cycle: CycleType,
     ) -> BaseState:
-        return self.gemini_client.generate_structured(
-            prompt=prompt,
+        cache_key = make_cache_key(
+            prompt=prompt.text,
+            model=self.gemini_client.model,
             response_schema_cls=response_schema_cls,
             temperature=llm_temperature,
         )
+        cached = await self.response_cache.get(key=cache_key)
+        if cached is not None:
+            return response_schema_cls.model_validate(cached)
 
-    def add_state(
-        self,
-        scenario_name: str,
-        state_data: dict[str, Any],
-    ) -> ScenarioState:
-        return self.state_repository.add_state(
+        async with self.telemetry.track(
             scenario_name=scenario_name,
-            state_data=state_data,
+            cycle=cycle,
+            model=self.gemini_client.model,
+            prompt=prompt.text,
+        ) as stats:
+            state = await self.gemini_client.generate_structured(
+                prompt=prompt.contents,
+                system_instruction=prompt.system_instruction,
+                response_schema_cls=response_schema_cls,
+                temperature=llm_temperature,
+                stats=stats,
+            )
+        await self.response_cache.set(
+            key=cache_key,
+            model=self.gemini_client.model,
+            response=state.model_dump(),
         )
+        return state
 
-    def create_next_state(
+    async def stream_state(
         self,
-        scenario_name: str,
-        prompt: str,
+        prompt: RenderedPrompt,
         response_schema_cls: type[BaseState],
         *,
         llm_temperature: float,
-    ):
-        next_state = self.generate_state(
-            prompt=prompt,
+        scenario_name: str,
+        cycle: CycleType,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Потоковый вариант generate_state: отдаёт поля по мере готовности.
+
+        Полный ответ валидируется и кэшируется после окончания потока;
+        при попадании в кэш все поля отдаются сразу.
+        """
+        cache_key = make_cache_key(
+            prompt=prompt.text,
+            model=self.gemini_client.model,
             response_schema_cls=response_schema_cls,
-            llm_temperature=llm_temperature,
+            temperature=llm_temperature,
         )
-        new_state = self.add_state(
+        cached = await self.response_cache.get(key=cache_key)
+        if cached is not None:
+            state = response_schema_cls.model_validate(cached)
+            last_fields = response_schema_cls.stream_last_fields
+            names = [
+                *(name for name in cached if name not in last_fields),
+                *(name for name in last_fields if name in cached),
+            ]
+            for name in names:
+                yield name, getattr(state, name)
+            return
+
+        fields: dict[str, Any] = {}
+        async with self.telemetry.track(
             scenario_name=scenario_name,
-            state_data=next_state.model_dump(),
+            cycle=cycle,
+            model=self.gemini_client.model,
+            prompt=prompt.text,
+            streamed=True,
+        ) as stats:
+            async for name, value in self.gemini_client.stream_structured(
+                prompt=prompt.contents,
+                system_instruction=prompt.system_instruction,
+                response_schema_cls=response_schema_cls,
+                temperature=llm_temperature,
+                stats=stats,
+            ):
+                fields[name] = value
+                yield name, value
+        state = response_schema_cls.model_validate(fields)
+        await self.response_cache.set(
+            key=cache_key,
+            model=self.gemini_client.model,
+            response=state.model_dump(),
+        )
+
+    async def update_state(self, state_id: int, state: BaseState) -> None:
+        """Перезаписывает данные уже записанного состояния."""
+        await self.state_repository.update_state_data(
+            state_id=state_id,
+            state_data=state.model_dump(),
+        )
+
+    async def add_candidate(
+        self,
+        state_id: int,
+        option_text: str,
+        candidate: BaseState,
+    ) -> None:
+        await self.candidate_repository.add_candidate(
+            state_id=state_id,
+            option_text=option_text,
+            state_data=candidate.model_dump(),
+        )
+
+    async def get_candidate_option_texts(self, state_id: int) -> set[str]:
+        return await self.candidate_repository.get_candidate_option_texts(
+            state_id=state_id,
         )
-        next_state.id = new_state.id
-        return next_state
 
-    def get_latest_state(
+    async def get_candidate(
+        self,
+        state_id: int,
+        option_text: str,
+        response_schema_cls: type[BaseState],
+    ) -> BaseState | None:
+        candidate = await self.candidate_repository.get_candidate(
+            state_id=state_id,
+            option_text=option_text,
+        )
+        if candidate is None:
+            return None
+        return response_schema_cls.model_validate(candidate.state_data)
+
+    async def discard_candidates(self, state_id: int) -> None:
+        await self.candidate_repository.delete_candidates(state_id=state_id)
+
+    async def get_latest_state(
         self,
         scenario_name: str,
         response_schema_cls: type[BaseState],
     ) -> BaseState | None:
-        state = self.state_repository.get_latest_state(
+        state = await self.state_repository.get_latest_state(
             scenario_name=scenario_name,
         )
         if state is None:
             return None
+        return self.to_schema(
+            record=state,
+            response_schema_cls=response_schema_cls,
+        )
 
-        response_schema = response_schema_cls(**state.state_data)
-        response_schema.id = state.id
+    async def get_latest_state_record(
+        self,
+        scenario_name: str,
+    ) -> ScenarioState | None:
+        return await self.state_repository.get_latest_aggregate(
+            scenario_name=scenario_name,
+        )
+
+    async def get_latest_state_records(
+        self,
+        scenario_names: Sequence[str],
+    ) -> dict[str, ScenarioState]:
+        return await self.state_repository.get_latest_aggregates(
+            scenario_names=scenario_names,
+        )
+
+    @staticmethod
+    def to_schema(
+        record: ScenarioState,
+        response_schema_cls: type[BaseState],
+    ) -> BaseState:
+        response_schema = response_schema_cls(**record.state_data)
+        response_schema.id = record.id
         return response_schema
+
+    async def add_next_state(
+        self,
+        scenario_name: str,
+        parent_id: int | None,
+        state: BaseState,
+        poll: Poll,
+    ) -> ScenarioState:
+        """Записывает состояние, следующее за parent_id, вместе с опросом.
+
+        Состояние генерируется вне транзакции, поэтому перед записью
+        проверяется, что parent_id всё ещё последнее состояние сценария.
+        Гонку двух одновременных записей отсекает уникальный parent_id:
+        проигравшая получает StaleStateError, а её транзакция откатывается.
+        """
+        latest_id = await self.state_repository.get_latest_state_id(
+            scenario_name=scenario_name,
+        )
+        if latest_id != parent_id:
+            raise StaleStateError(
+                scenario_name=scenario_name,
+                parent_id=parent_id,
+            )
+        try:
+            record = await self.state_repository.add_aggregate(
+                scenario_name=scenario_name,
+                parent_id=parent_id,
+                state_data=state.model_dump(),
+                poll=poll,
+            )
+        except IntegrityError as e:
+            raise StaleStateError(
+                scenario_name=scenario_name,
+                parent_id=parent_id,
+            ) from e
+        state.id = record.id
+        return record
@@ -1,14 +1,77 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import uuid
+
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
 
 from core.config.settings import PostgresSettings
 
 
-def new_session_maker(settings: PostgresSettings):
-    engine = create_engine(settings.psycopg_dsn)
-    return sessionmaker(
+def new_engine(settings: PostgresSettings) -> AsyncEngine:
+    if settings.pgbouncer:
+        return _new_pgbouncer_engine(settings)
+    connect_args: dict[str, Any] = {}
+    if settings.statement_timeout:
+        connect_args["server_settings"] = {
+            "statement_timeout": _statement_timeout_ms(settings),
+        }
+    return create_async_engine(
+        settings.asyncpg_dsn,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+def _new_pgbouncer_engine(settings: PostgresSettings) -> AsyncEngine:
+    """Движок для pgbouncer в режиме transaction pooling.
+
+    Соединения держит pgbouncer, поэтому свой пул не нужен. Серверное
+    соединение меняется между транзакциями, поэтому prepared statements
+    не кэшируются, а их имена уникальны. Параметры запуска pgbouncer не
+    пропускает, и statement_timeout ставится в начале каждой транзакции.
+    """
+    engine = create_async_engine(
+        settings.asyncpg_dsn,
+        poolclass=NullPool,
+        connect_args={
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": (
+                lambda: f"__asyncpg_{uuid.uuid4()}__"
+            ),
+        },
+    )
+    if settings.statement_timeout:
+        timeout = _statement_timeout_ms(settings)
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def set_statement_timeout(conn: Connection) -> None:
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+    return engine
+
+
+def _statement_timeout_ms(settings: PostgresSettings) -> str:
+    return str(int(settings.statement_timeout * 1000))
+
+
+def new_session_maker(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
         bind=engine,
-        autocommit=False,
         autoflush=False,
         expire_on_commit=False,
     )
@@ -0,0 +1,19 @@
+from sqlalchemy import JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+
+
+class StateCandidate(Base, TimestampsMixin):
+    __tablename__ = "state_candidates"
+    __table_args__ = (UniqueConstraint("state_id", "option_text"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    option_text: Mapped[str] = mapped_column(nullable=False)
+    state_data: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    state_id: Mapped[int] = mapped_column(
+        ForeignKey("scenario_states.id", ondelete="CASCADE"),
+        nullable=False,
+    )
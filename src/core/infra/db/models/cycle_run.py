@@ -0,0 +1,47 @@
+from sqlalchemy import ForeignKey, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+from core.types import CycleRunStatus
+
+
+class CycleRun(Base, TimestampsMixin):
+    """Запуск цикла сценария для конкретного состояния.
+
+    Тройка (scenario_name, state_id, cycle) — ключ идемпотентности:
+    завершённый цикл для того же состояния повторно не выполняется.
+    state_id пуст у генерации первого состояния сценария, поэтому
+    NULL в ключе не считаются различными.
+
+    stage — последний пройденный этап запуска, checkpoint — данные для
+    продолжения с него: повторный запуск после сбоя берёт готовый
+    результат LLM из checkpoint вместо новой генерации.
+    """
+
+    __tablename__ = "cycle_runs"
+    __table_args__ = (
+        UniqueConstraint(
+            "scenario_name",
+            "state_id",
+            "cycle",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scenario_name: Mapped[str] = mapped_column(nullable=False)
+    cycle: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(
+        nullable=False,
+        server_default=CycleRunStatus.STARTED,
+    )
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default="1")
+    error: Mapped[str | None] = mapped_column(Text)
+    stage: Mapped[str | None]
+    checkpoint: Mapped[dict | None] = mapped_column(JSONB)
+
+    state_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scenario_states.id", ondelete="CASCADE"),
+    )
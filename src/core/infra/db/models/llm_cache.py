@@ -0,0 +1,14 @@
+from sqlalchemy import JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+
+
+class LLMCacheEntry(Base, TimestampsMixin):
+    __tablename__ = "llm_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(nullable=False)
+    response: Mapped[dict] = mapped_column(JSON, nullable=False)
+    hits: Mapped[int] = mapped_column(nullable=False, server_default="0")
@@ -0,0 +1,27 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+
+
+class LLMCall(Base, TimestampsMixin):
+    """Один вызов LLM; длительности хранятся в секундах."""
+
+    __tablename__ = "llm_calls"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scenario_name: Mapped[str] = mapped_column(nullable=False, index=True)
+    cycle: Mapped[str] = mapped_column(nullable=False)
+    model: Mapped[str] = mapped_column(nullable=False)
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    streamed: Mapped[bool] = mapped_column(nullable=False)
+    attempts: Mapped[int] = mapped_column(nullable=False)
+    prompt_tokens: Mapped[int | None]
+    cached_tokens: Mapped[int | None]
+    response_tokens: Mapped[int | None]
+    total_tokens: Mapped[int | None]
+    cost: Mapped[float | None]
+    first_token_latency: Mapped[float | None]
+    latency: Mapped[float] = mapped_column(nullable=False)
+    error: Mapped[str | None]
@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+
+
+class ScenarioMemory(Base, TimestampsMixin):
+    __tablename__ = "scenario_memories"
+
+    scenario_name: Mapped[str] = mapped_column(primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Последнее состояние, уже учтённое в summary
+    state_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scenario_states.id", ondelete="SET NULL"),
+    )
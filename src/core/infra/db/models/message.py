@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.infra.db.models.base import Base
@@ -7,6 +7,7 @@ from core.infra.db.models.mixins import TimestampsMixin
 
 class Message(Base, TimestampsMixin):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_state_id_type", "state_id", "type"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
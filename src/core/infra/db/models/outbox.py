@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    Index,
+    Text,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+from core.types import OutboxStatus
+
+
+class OutboxMessage(Base, TimestampsMixin):
+    """Публикация в Telegram, ожидающая отправки или уже отправленная.
+
+    payload — аргументы метода клиента без chat_id и priority. Если
+    задан message_type, после отправки для state_id записывается Message.
+    content_hash — хеш метода, payload и state_id: одинаковая публикация
+    в чат ставится в очередь один раз.
+    """
+
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        UniqueConstraint("chat_id", "content_hash"),
+        # Очередь отправки: неотправленные публикации чата в порядке id
+        Index(
+            "ix_outbox_messages_pending",
+            "chat_id",
+            "id",
+            postgresql_where=text(f"status = '{OutboxStatus.PENDING}'"),
+        ),
+        # Окончательно не отправленные публикации: блокируют остальные
+        # публикации своего состояния и показываются застрявшему циклу
+        Index(
+            "ix_outbox_messages_failed",
+            "state_id",
+            "chat_id",
+            postgresql_where=text(f"status = '{OutboxStatus.FAILED}'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Числовой id или @username канала, как в настройках сценария
+    chat_id: Mapped[str] = mapped_column(nullable=False)
+    method: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    priority: Mapped[int] = mapped_column(nullable=False)
+    message_type: Mapped[str | None]
+    # Пуст у публикаций, поставленных до появления дедупликации
+    content_hash: Mapped[str | None]
+
+    status: Mapped[str] = mapped_column(
+        nullable=False,
+        server_default=OutboxStatus.PENDING,
+    )
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    # Раньше этого времени публикация не отправляется: отсрочка повтора
+    available_at: Mapped[datetime] = mapped_column(
+        nullable=False,
+        server_default=func.now(),
+    )
+    # Аренда диспетчера, забравшего публикацию на отправку
+    locked_until: Mapped[datetime | None]
+    message_id: Mapped[int | None] = mapped_column(BigInteger)
+    sent_at: Mapped[datetime | None]
+    error: Mapped[str | None] = mapped_column(Text)
+
+    state_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scenario_states.id", ondelete="CASCADE"),
+    )
@@ -1,4 +1,5 @@
-from sqlalchemy import JSON, ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.infra.db.models.base import Base
@@ -14,12 +15,15 @@ class Poll(Base, TimestampsMixin):
     state_id: Mapped[int] = mapped_column(
         ForeignKey("scenario_states.id", ondelete="CASCADE"),
         nullable=False,
+        unique=True,
     )
     state: Mapped["ScenarioState"] = relationship(back_populates="poll")
 
+    # Порядок опций совпадает с порядком в опросе Telegram
     options: Mapped[list["PollOption"]] = relationship(
         back_populates="poll",
         cascade="all, delete-orphan",
+        order_by="PollOption.id",
     )
     result: Mapped["PollResult"] = relationship(
         uselist=False,
@@ -30,10 +34,15 @@ class Poll(Base, TimestampsMixin):
 
 class PollOption(Base):
     __tablename__ = "poll_options"
+    __table_args__ = (
+        Index("ix_poll_options_poll_id_text", "poll_id", "text"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     text: Mapped[str] = mapped_column(nullable=False)
     effect: Mapped[str] = mapped_column(nullable=False)
+    # Заполняется при закрытии опроса
+    voter_count: Mapped[int | None]
 
     poll_id: Mapped[int] = mapped_column(
         ForeignKey("polls.id", ondelete="CASCADE"),
@@ -44,11 +53,29 @@ class PollOption(Base):
 
 class PollResult(Base):
     __tablename__ = "poll_results"
+    __table_args__ = (
+        Index(
+            "ix_poll_results_results",
+            "results",
+            postgresql_using="gin",
+            postgresql_ops={"results": "jsonb_path_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    results: Mapped[dict] = mapped_column(JSON, nullable=False)
+    results: Mapped[dict] = mapped_column(JSONB, nullable=False)
     poll_id: Mapped[int] = mapped_column(
         ForeignKey("polls.id", ondelete="CASCADE"),
         nullable=False,
+        unique=True,
     )
     poll: Mapped["Poll"] = relationship(back_populates="result")
+
+
+# Победитель опроса: больше всего голосов, при равенстве — первая опция
+Index(
+    "ix_poll_options_poll_id_voter_count_id",
+    PollOption.poll_id,
+    PollOption.voter_count.desc(),
+    PollOption.id,
+)
@@ -1,4 +1,5 @@
-from sqlalchemy import JSON
+from sqlalchemy import ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.infra.db.models.base import Base
@@ -7,10 +8,33 @@ from core.infra.db.models.mixins import TimestampsMixin
 
 class ScenarioState(Base, TimestampsMixin):
     __tablename__ = "scenario_states"
+    __table_args__ = (
+        # Последнее состояние сценария читается обратным проходом по индексу
+        Index("ix_scenario_states_scenario_name_id", "scenario_name", "id"),
+        Index(
+            "ix_scenario_states_state_data",
+            "state_data",
+            postgresql_using="gin",
+            postgresql_ops={"state_data": "jsonb_path_ops"},
+        ),
+        # Горячий ключ для выборок по диапазону цены
+        Index(
+            "ix_scenario_states_current_price",
+            "scenario_name",
+            text("((state_data ->> 'current_price')::double precision)"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     scenario_name: Mapped[str] = mapped_column(nullable=False)
-    state_data: Mapped[dict] = mapped_column(JSON, nullable=False)
+    state_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    # У состояния может быть только одно следующее: уникальность parent_id
+    # отсекает конкурентную запись поверх устаревшего состояния
+    parent_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scenario_states.id", ondelete="SET NULL"),
+        unique=True,
+    )
 
     poll: Mapped["Poll"] = relationship(
         uselist=False,
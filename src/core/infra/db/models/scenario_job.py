@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Index, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.infra.db.models.base import Base
+from core.infra.db.models.mixins import TimestampsMixin
+
+
+class ScenarioJob(Base, TimestampsMixin):
+    """Расписание циклов сценария; run_interval указывается в секундах.
+
+    Воркер, забравший задачу, держит аренду до locked_until и продлевает
+    её, пока циклы выполняются. Если воркер упал, после истечения аренды
+    задачу забирает другой.
+    """
+
+    __tablename__ = "scenario_jobs"
+    __table_args__ = (
+        UniqueConstraint("scenario_name", "cycles"),
+        Index("ix_scenario_jobs_next_run_at", "next_run_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scenario_name: Mapped[str] = mapped_column(nullable=False)
+    cycles: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
+    run_interval: Mapped[float] = mapped_column(nullable=False)
+    next_run_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    locked_until: Mapped[datetime | None]
+    locked_by: Mapped[str | None]
+    last_started_at: Mapped[datetime | None]
+    last_finished_at: Mapped[datetime | None]
+    last_error: Mapped[str | None] = mapped_column(Text)
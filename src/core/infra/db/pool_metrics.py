@@ -0,0 +1,101 @@
+import logging
+import time
+
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    connects: int = 0
+    checkouts: int = 0
+    invalidations: int = 0
+    checked_out: int = 0
+    max_checked_out: int = 0
+    # Суммарное время, на которое соединения забирались из пула, в секундах
+    hold_time: float = 0
+
+    @property
+    def avg_hold_time(self) -> float:
+        return self.hold_time / self.checkouts if self.checkouts else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"connects={self.connects} checkouts={self.checkouts} "
+            f"checked_out={self.checked_out} "
+            f"max_checked_out={self.max_checked_out} "
+            f"invalidations={self.invalidations} "
+            f"avg_hold_time={self.avg_hold_time:.3f}s"
+        )
+
+
+class PoolMetrics:
+    """Счётчики пула соединений по событиям SQLAlchemy.
+
+    Предупреждает, когда заняты все соединения пула и следующие запросы
+    будут ждать освобождения до pool_timeout.
+    """
+
+    def __init__(self, engine: AsyncEngine, capacity: int | None = None):
+        self.engine = engine
+        self.capacity = capacity
+        self.stats = PoolStats()
+        self._checked_out_at: dict[int, float] = {}
+
+        pool = engine.sync_engine.pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def status(self) -> str:
+        return f"{self.engine.pool.status()}; {self.stats}"
+
+    def _on_connect(self, _dbapi_connection, _connection_record) -> None:
+        self.stats.connects += 1
+
+    def _on_checkout(
+        self,
+        _dbapi_connection,
+        connection_record: ConnectionPoolEntry,
+        _connection_proxy: PoolProxiedConnection,
+    ) -> None:
+        self.stats.checkouts += 1
+        self.stats.checked_out += 1
+        self.stats.max_checked_out = max(
+            self.stats.max_checked_out,
+            self.stats.checked_out,
+        )
+        self._checked_out_at[id(connection_record)] = time.monotonic()
+        if self.capacity and self.stats.checked_out >= self.capacity:
+            logger.warning(
+                f"Database pool exhausted: {self.stats.checked_out} of "
+                f"{self.capacity} connections checked out",
+            )
+
+    def _on_checkin(
+        self,
+        _dbapi_connection,
+        connection_record: ConnectionPoolEntry,
+    ) -> None:
+        checked_out_at = self._checked_out_at.pop(
+            id(connection_record),
+            None,
+        )
+        if checked_out_at is None:
+            return
+        self.stats.checked_out -= 1
+        self.stats.hold_time += time.monotonic() - checked_out_at
+
+    def _on_invalidate(
+        self,
+        _dbapi_connection,
+        _connection_record,
+        _exception,
+    ) -> None:
+        self.stats.invalidations += 1
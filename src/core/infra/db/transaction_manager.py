@@ -1,28 +1,35 @@
-from sqlalchemy.orm import Session
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
 
 
 class TransactionManager:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def commit(self):
-        self.session.commit()
+    async def commit(self):
+        await self.session.commit()
+
+    async def flush(self):
+        await self.session.flush()
 
-    def rollback(self):
-        self.session.rollback()
+    async def rollback(self):
+        await self.session.rollback()
 
-    def close(self):
-        self.session.close()
+    async def close(self):
+        await self.session.close()
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc_value, traceback):
+    async def __aexit__(self, exc_type, exc_value, traceback):
         if exc_type is not None:
-            self.rollback()
-            print("rollback")
+            await self.rollback()
+            logger.debug("Transaction rolled back")
         else:
-            self.commit()
-            print("commit")
+            await self.commit()
+            logger.debug("Transaction committed")
 
-        self.close()
+        await self.close()
@@ -5,9 +5,16 @@ from sqlalchemy import engine_from_config, pool
 
 from core.config.settings import load_app_settings
 from core.infra.db.models.base import Base
+from core.infra.db.models.candidate import *
+from core.infra.db.models.cycle_run import *
+from core.infra.db.models.llm_cache import *
+from core.infra.db.models.llm_call import *
+from core.infra.db.models.memory import *
 from core.infra.db.models.message import *
+from core.infra.db.models.outbox import *
 from core.infra.db.models.poll import *
 from core.infra.db.models.scenario import *
+from core.infra.db.models.scenario_job import *
 
 settings = load_app_settings()
 
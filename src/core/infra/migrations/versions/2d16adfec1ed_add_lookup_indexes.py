@@ -0,0 +1,81 @@
+"""add lookup indexes
+
+Revision ID: 2d16adfec1ed
+Revises: b46664d011a0
+Create Date: 2026-10-18 16:25:26.939825
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d16adfec1ed'
+down_revision: Union[str, None] = 'b46664d011a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY не блокирует запись в таблицы, но не может
+# выполняться внутри транзакции, поэтому индексы строятся в autocommit.
+INDEXES = (
+    ("ix_scenario_states_scenario_name_id", "scenario_states",
+     ["scenario_name", "id"]),
+    ("ix_messages_state_id_type", "messages", ["state_id", "type"]),
+    ("ix_poll_options_poll_id_text", "poll_options", ["poll_id", "text"]),
+)
+
+# Уникальные ограничения создаются поверх готового уникального индекса,
+# чтобы не держать блокировку на время его построения
+UNIQUE_CONSTRAINTS = (
+    ("uq_polls_state_id", "polls", ["state_id"]),
+    ("uq_poll_results_poll_id", "poll_results", ["poll_id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Повторные итоги опроса раньше не запрещались, оставляем последние
+    op.execute(
+        "DELETE FROM poll_results AS r USING poll_results AS newer "
+        "WHERE newer.poll_id = r.poll_id AND newer.id > r.id",
+    )
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, columns in UNIQUE_CONSTRAINTS:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                f"UNIQUE USING INDEX {name}",
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, table, type_="unique")
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
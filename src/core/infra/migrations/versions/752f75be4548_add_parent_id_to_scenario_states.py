@@ -0,0 +1,78 @@
+"""add parent_id to scenario_states
+
+Revision ID: 752f75be4548
+Revises: 99a39fd3590c
+Create Date: 2026-10-18 16:39:57.729078
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '752f75be4548'
+down_revision: Union[str, None] = '99a39fd3590c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "scenario_states",
+        sa.Column("parent_id", sa.Integer(), nullable=True),
+    )
+    # Родитель существующих состояний — предыдущее состояние сценария
+    op.execute(
+        """
+        UPDATE scenario_states AS s
+        SET parent_id = p.parent_id
+        FROM (
+            SELECT
+                id,
+                lag(id) OVER (PARTITION BY scenario_name ORDER BY id)
+                    AS parent_id
+            FROM scenario_states
+        ) AS p
+        WHERE s.id = p.id AND p.parent_id IS NOT NULL
+        """,
+    )
+    op.create_foreign_key(
+        op.f("fk_scenario_states_parent_id_scenario_states"),
+        "scenario_states",
+        "scenario_states",
+        ["parent_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_scenario_states_parent_id",
+            "scenario_states",
+            ["parent_id"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.execute(
+            "ALTER TABLE scenario_states "
+            "ADD CONSTRAINT uq_scenario_states_parent_id "
+            "UNIQUE USING INDEX uq_scenario_states_parent_id",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        op.f("fk_scenario_states_parent_id_scenario_states"),
+        "scenario_states",
+        type_="foreignkey",
+    )
+    op.drop_constraint(
+        op.f("uq_scenario_states_parent_id"),
+        "scenario_states",
+        type_="unique",
+    )
+    op.drop_column("scenario_states", "parent_id")
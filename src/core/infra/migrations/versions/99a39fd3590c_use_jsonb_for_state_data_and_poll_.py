@@ -0,0 +1,88 @@
+"""use jsonb for state_data and poll results
+
+Revision ID: 99a39fd3590c
+Revises: cb2be6b8586c
+Create Date: 2026-10-18 16:32:21.012848
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '99a39fd3590c'
+down_revision: Union[str, None] = 'cb2be6b8586c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Смена типа переписывает таблицу под эксклюзивной блокировкой, а
+# индексы затем строятся конкурентно, вне транзакции
+COLUMNS = (
+    ("scenario_states", "state_data"),
+    ("poll_results", "results"),
+)
+
+INDEXES = (
+    ("ix_scenario_states_state_data", "scenario_states", ["state_data"], {
+        "postgresql_using": "gin",
+        "postgresql_ops": {"state_data": "jsonb_path_ops"},
+    }),
+    ("ix_scenario_states_current_price", "scenario_states", [
+        "scenario_name",
+        sa.literal_column(
+            "((state_data ->> 'current_price')::double precision)",
+        ),
+    ], {}),
+    ("ix_poll_results_results", "poll_results", ["results"], {
+        "postgresql_using": "gin",
+        "postgresql_ops": {"results": "jsonb_path_ops"},
+    }),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=postgresql.JSON(astext_type=sa.Text()),
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_nullable=False,
+            postgresql_using=f"{column}::jsonb",
+        )
+    with op.get_context().autocommit_block():
+        for name, table, columns, kw in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kw,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            type_=postgresql.JSON(astext_type=sa.Text()),
+            existing_nullable=False,
+            postgresql_using=f"{column}::json",
+        )
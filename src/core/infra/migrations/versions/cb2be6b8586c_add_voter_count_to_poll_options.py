@@ -0,0 +1,68 @@
+"""add voter_count to poll_options
+
+Revision ID: cb2be6b8586c
+Revises: 2d16adfec1ed
+Create Date: 2026-10-18 16:27:46.052608
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cb2be6b8586c'
+down_revision: Union[str, None] = '2d16adfec1ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "poll_options",
+        sa.Column("voter_count", sa.Integer(), nullable=True),
+    )
+    # Итоги stopPoll перечисляют опции в порядке отправки опроса
+    op.execute(
+        """
+        UPDATE poll_options AS o
+        SET voter_count = (r.option ->> 'voter_count')::integer
+        FROM (
+            SELECT
+                id,
+                poll_id,
+                row_number() OVER (PARTITION BY poll_id ORDER BY id) AS pos
+            FROM poll_options
+        ) AS p
+        JOIN poll_results AS pr ON pr.poll_id = p.poll_id
+        CROSS JOIN LATERAL json_array_elements(
+            CASE json_typeof(pr.results)
+                WHEN 'array' THEN pr.results ELSE '[]'::json
+            END
+        ) WITH ORDINALITY AS r (option, pos)
+        WHERE o.id = p.id AND r.pos = p.pos
+        """,
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_poll_options_poll_id_voter_count_id",
+            "poll_options",
+            ["poll_id", sa.literal_column("voter_count DESC"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_poll_options_poll_id_voter_count_id",
+            table_name="poll_options",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("poll_options", "voter_count")
@@ -0,0 +1,48 @@
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.sql.operators import eq
+
+from core.infra.db.models.candidate import StateCandidate
+from core.infra.repositories.base import BaseRepository
+
+
+class StateCandidateRepository(BaseRepository):
+    async def add_candidate(
+        self,
+        state_id: int,
+        option_text: str,
+        state_data: dict[str, Any],
+    ) -> StateCandidate:
+        candidate = StateCandidate(
+            state_id=state_id,
+            option_text=option_text,
+            state_data=state_data,
+        )
+        self.session.add(candidate)
+        await self.session.flush()
+        return candidate
+
+    async def get_candidate(
+        self,
+        state_id: int,
+        option_text: str,
+    ) -> StateCandidate | None:
+        stmt = (
+            select(StateCandidate)
+            .where(eq(StateCandidate.state_id, state_id))
+            .where(eq(StateCandidate.option_text, option_text))
+        )
+        return (await self.session.scalars(stmt)).first()
+
+    async def get_candidate_option_texts(self, state_id: int) -> set[str]:
+        stmt = select(StateCandidate.option_text).where(
+            eq(StateCandidate.state_id, state_id),
+        )
+        return set((await self.session.scalars(stmt)).all())
+
+    async def delete_candidates(self, state_id: int) -> None:
+        stmt = delete(StateCandidate).where(
+            eq(StateCandidate.state_id, state_id),
+        )
+        await self.session.execute(stmt)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.operators import eq
+
+from core.infra.db.models.cycle_run import CycleRun
+from core.infra.repositories.base import BaseRepository
+from core.types import CycleRunStatus, CycleStage, CycleType
+
+
+class CycleRunRepository(BaseRepository):
+    async def claim_run(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        stale_after: timedelta,
+    ) -> CycleRun | None:
+        """Записывает запуск цикла, если он ещё не выполнялся.
+
+        Повторно запуск забирается, только если прошлый упал или завис в
+        started дольше stale_after; его stage и checkpoint сохраняются.
+        Конкурентная вставка того же ключа ждёт коммита первой и
+        получает None.
+        """
+        now = func.now()
+        stmt = insert(CycleRun).values(
+            scenario_name=scenario_name,
+            state_id=state_id,
+            cycle=cycle,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                CycleRun.scenario_name,
+                CycleRun.state_id,
+                CycleRun.cycle,
+            ],
+            set_={
+                "status": CycleRunStatus.STARTED,
+                "attempts": CycleRun.attempts + 1,
+                "error": None,
+                "updated_at": now,
+            },
+            where=(
+                eq(CycleRun.status, CycleRunStatus.FAILED)
+                | (
+                    eq(CycleRun.status, CycleRunStatus.STARTED)
+                    & (CycleRun.updated_at < now - stale_after)
+                )
+            ),
+        ).returning(CycleRun)
+        return await self.session.scalar(
+            stmt,
+            execution_options={"populate_existing": True},
+        )
+
+    async def save_checkpoint(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        stage: CycleStage,
+        checkpoint: dict[str, Any],
+    ) -> None:
+        await self._update(
+            scenario_name,
+            state_id,
+            cycle,
+            stage=stage,
+            checkpoint=checkpoint,
+        )
+
+    async def complete_run(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+    ) -> None:
+        await self._update(
+            scenario_name,
+            state_id,
+            cycle,
+            status=CycleRunStatus.COMPLETED,
+            error=None,
+            stage=CycleStage.RECORDED,
+            checkpoint=None,
+        )
+
+    async def fail_run(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        error: str,
+    ) -> None:
+        await self._update(
+            scenario_name,
+            state_id,
+            cycle,
+            status=CycleRunStatus.FAILED,
+            error=error,
+        )
+
+    async def _update(
+        self,
+        scenario_name: str,
+        state_id: int | None,
+        cycle: CycleType,
+        **values: Any,
+    ) -> None:
+        stmt = (
+            update(CycleRun)
+            .where(eq(CycleRun.scenario_name, scenario_name))
+            .where(
+                CycleRun.state_id.is_(None)
+                if state_id is None
+                else eq(CycleRun.state_id, state_id),
+            )
+            .where(eq(CycleRun.cycle, cycle))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
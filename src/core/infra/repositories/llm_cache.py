@@ -0,0 +1,54 @@
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.operators import eq
+
+from core.infra.db.models.llm_cache import LLMCacheEntry
+from core.infra.repositories.base import BaseRepository
+
+
+class LLMCacheRepository(BaseRepository):
+    async def get_entry(self, key: str) -> LLMCacheEntry | None:
+        return await self.session.get(LLMCacheEntry, key)
+
+    async def add_entry(
+        self,
+        key: str,
+        model: str,
+        response: dict[str, Any],
+    ) -> None:
+        # Один и тот же ключ могут одновременно записать несколько
+        # циклов; ответ на тот же промпт равноценен, остаётся первый
+        stmt = (
+            insert(LLMCacheEntry)
+            .values(key=key, model=model, response=response)
+            .on_conflict_do_nothing(index_elements=[LLMCacheEntry.key])
+        )
+        await self.session.execute(stmt)
+
+    async def increment_hits(self, key: str) -> None:
+        stmt = (
+            update(LLMCacheEntry)
+            .where(eq(LLMCacheEntry.key, key))
+            .values(hits=LLMCacheEntry.hits + 1)
+        )
+        await self.session.execute(stmt)
+
+    async def delete_older_than(self, ttl: timedelta) -> int:
+        stmt = delete(LLMCacheEntry).where(
+            LLMCacheEntry.created_at < func.now() - ttl,
+        )
+        return (await self.session.execute(stmt)).rowcount
+
+    async def delete_least_recently_used(self, keep: int) -> int:
+        keep_keys = (
+            select(LLMCacheEntry.key)
+            .order_by(LLMCacheEntry.updated_at.desc())
+            .limit(keep)
+        )
+        stmt = delete(LLMCacheEntry).where(
+            LLMCacheEntry.key.not_in(keep_keys),
+        )
+        return (await self.session.execute(stmt)).rowcount
@@ -0,0 +1,9 @@
+from core.infra.db.models.llm_call import LLMCall
+from core.infra.repositories.base import BaseRepository
+
+
+class LLMCallRepository(BaseRepository):
+    async def add_call(self, call: LLMCall) -> LLMCall:
+        self.session.add(call)
+        await self.session.flush()
+        return call
@@ -0,0 +1,22 @@
+from core.infra.db.models.memory import ScenarioMemory
+from core.infra.repositories.base import BaseRepository
+
+
+class ScenarioMemoryRepository(BaseRepository):
+    async def get_memory(self, scenario_name: str) -> ScenarioMemory | None:
+        return await self.session.get(ScenarioMemory, scenario_name)
+
+    async def save_memory(
+        self,
+        scenario_name: str,
+        summary: str,
+        state_id: int,
+    ) -> ScenarioMemory:
+        memory = ScenarioMemory(
+            scenario_name=scenario_name,
+            summary=summary,
+            state_id=state_id,
+        )
+        await self.session.merge(memory)
+        await self.session.flush()
+        return memory
@@ -0,0 +1,215 @@
+import hashlib
+import json
+
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import exists, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.operators import eq
+
+from core.infra.db.models.outbox import OutboxMessage
+from core.infra.repositories.base import BaseRepository
+from core.types import OutboxStatus
+
+# Ключ advisory lock, которым сериализуется захват пачек диспетчерами
+OUTBOX_CLAIM_LOCK = 0x6F7574626F78
+
+
+def make_content_hash(
+    method: str,
+    payload: dict[str, Any],
+    state_id: int | None,
+) -> str:
+    content = json.dumps(
+        {"method": method, "payload": payload, "state_id": state_id},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class OutboxRepository(BaseRepository):
+    async def add_message(self, message: OutboxMessage) -> int | None:
+        """Ставит публикацию в очередь и возвращает её id.
+
+        message в сессию не добавляется: из него берутся только поля
+        вставки. Если такая же публикация в этот чат уже есть в outbox,
+        новая не добавляется и возвращается None.
+        """
+        stmt = (
+            insert(OutboxMessage)
+            .values(
+                chat_id=message.chat_id,
+                method=message.method,
+                payload=message.payload,
+                priority=message.priority,
+                state_id=message.state_id,
+                message_type=message.message_type,
+                content_hash=make_content_hash(
+                    method=message.method,
+                    payload=message.payload,
+                    state_id=message.state_id,
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    OutboxMessage.chat_id,
+                    OutboxMessage.content_hash,
+                ],
+            )
+            .returning(OutboxMessage.id)
+        )
+        return await self.session.scalar(stmt)
+
+    async def claim_batch(
+        self,
+        limit: int,
+        lease: timedelta,
+    ) -> list[OutboxMessage]:
+        """Берёт в аренду до limit готовых к отправке публикаций.
+
+        Публикация готова, если в её чате нет более ранней неотправленной
+        публикации, которая ждёт повтора или арендована другим
+        диспетчером, поэтому сообщения чата уходят строго по порядку.
+        Публикации состояния, у которого более ранняя публикация упала
+        окончательно, не отправляются: опрос не уходит без поста.
+        Захват сериализуется advisory lock до конца транзакции.
+
+        Статусы подставляются литералами, иначе generic-план prepared
+        statement не может использовать частичные индексы.
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(OUTBOX_CLAIM_LOCK)),
+        )
+        now = func.now()
+        pending = literal(OutboxStatus.PENDING, literal_execute=True)
+        failed = literal(OutboxStatus.FAILED, literal_execute=True)
+        earlier = aliased(OutboxMessage)
+        waiting = exists().where(
+            eq(earlier.chat_id, OutboxMessage.chat_id),
+            earlier.id < OutboxMessage.id,
+            eq(earlier.status, pending),
+            or_(earlier.available_at > now, earlier.locked_until > now),
+        )
+        dead = aliased(OutboxMessage)
+        orphaned = exists().where(
+            eq(dead.chat_id, OutboxMessage.chat_id),
+            eq(dead.state_id, OutboxMessage.state_id),
+            dead.id < OutboxMessage.id,
+            eq(dead.status, failed),
+        )
+        ready = (
+            select(OutboxMessage.id)
+            .where(eq(OutboxMessage.status, pending))
+            .where(OutboxMessage.available_at <= now)
+            .where(
+                or_(
+                    OutboxMessage.locked_until.is_(None),
+                    OutboxMessage.locked_until <= now,
+                ),
+            )
+            .where(~waiting)
+            .where(~orphaned)
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+        )
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ready))
+            .values(locked_until=now + lease)
+            .returning(OutboxMessage)
+            .execution_options(synchronize_session=False)
+        )
+        messages = (await self.session.scalars(stmt)).all()
+        return sorted(messages, key=lambda message: message.id)
+
+    async def extend_lease(
+        self,
+        outbox_ids: Sequence[int],
+        lease: timedelta,
+    ) -> None:
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(outbox_ids))
+            .where(
+                eq(
+                    OutboxMessage.status,
+                    literal(OutboxStatus.PENDING, literal_execute=True),
+                ),
+            )
+            .where(OutboxMessage.locked_until.is_not(None))
+            .values(locked_until=func.now() + lease)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
+    async def mark_sent(self, outbox_id: int, message_id: int) -> None:
+        await self._update(
+            outbox_id,
+            status=OutboxStatus.SENT,
+            message_id=message_id,
+            sent_at=func.now(),
+            locked_until=None,
+            error=None,
+        )
+
+    async def mark_retry(
+        self,
+        outbox_id: int,
+        error: str,
+        delay: timedelta,
+    ) -> None:
+        await self._update(
+            outbox_id,
+            attempts=OutboxMessage.attempts + 1,
+            available_at=func.now() + delay,
+            locked_until=None,
+            error=error,
+        )
+
+    async def mark_failed(self, outbox_id: int, error: str) -> None:
+        await self._update(
+            outbox_id,
+            status=OutboxStatus.FAILED,
+            attempts=OutboxMessage.attempts + 1,
+            locked_until=None,
+            error=error,
+        )
+
+    async def get_failed_messages(
+        self,
+        state_id: int,
+    ) -> list[OutboxMessage]:
+        stmt = (
+            select(OutboxMessage)
+            .where(eq(OutboxMessage.state_id, state_id))
+            .where(
+                eq(
+                    OutboxMessage.status,
+                    literal(OutboxStatus.FAILED, literal_execute=True),
+                ),
+            )
+            .order_by(OutboxMessage.id)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def release(self, outbox_ids: Sequence[int]) -> None:
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(outbox_ids))
+            .values(locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
+    async def _update(self, outbox_id: int, **values: Any) -> None:
+        stmt = (
+            update(OutboxMessage)
+            .where(eq(OutboxMessage.id, outbox_id))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
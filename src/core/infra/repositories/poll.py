@@ -1,4 +1,7 @@
-from sqlalchemy import select
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql.operators import eq
 
 from core.infra.db.models.poll import Poll, PollOption, PollResult
@@ -7,59 +10,58 @@ from core.schemas import Option
 
 
 class PollRepository(BaseRepository):
-    def add_poll(
-        self,
-        question: str,
-        options: list[Option],
-        state_id: int,
-    ) -> Poll:
-        poll = Poll(
+    @staticmethod
+    def build_poll(question: str, options: list[Option]) -> Poll:
+        return Poll(
             question=question,
             options=[
                 PollOption(text=opt.text, effect=opt.effect)
                 for opt in options
             ],
-            state_id=state_id,
         )
-        self.session.add(poll)
-        self.session.flush()
-        return poll
 
-    def get_poll_by_state_id(
+    async def save_poll_results(
         self,
-        state_id: int,
-    ) -> Poll | None:
-        stmt = select(Poll).where(eq(Poll.state_id, state_id))
-        return self.session.scalars(stmt).first()
+        poll: Poll,
+        results: list[dict[str, Any]],
+    ) -> bool:
+        """Сохраняет итоги stopPoll и голоса опций, если их ещё нет.
 
-    def add_poll_results(
-        self,
-        poll_id: int,
-        results: dict[str, int],
-    ) -> PollResult:
-        result = PollResult(
-            results=results,
-            poll_id=poll_id,
+        poll может быть прочитан в уже закрытой сессии: используются
+        только id опроса и его опций. Telegram возвращает опции в том
+        же порядке, в котором они были отправлены, поэтому итоги
+        сопоставляются по позиции, а не по тексту. Возвращает False,
+        если итоги уже записал параллельный запуск.
+        """
+        if len(results) != len(poll.options):
+            raise ValueError(
+                f"Poll {poll.id} has {len(poll.options)} options, "
+                f"got results for {len(results)}",
+            )
+        stmt = (
+            insert(PollResult)
+            .values(poll_id=poll.id, results=results)
+            .on_conflict_do_nothing(index_elements=[PollResult.poll_id])
+            .returning(PollResult.id)
         )
-        self.session.add(result)
-        self.session.flush()
-        return result
-
-    def get_poll_results(
-        self,
-        poll_id: int,
-    ) -> PollResult | None:
-        stmt = select(PollResult).where(eq(PollResult.poll_id, poll_id))
-        return self.session.scalars(stmt).first()
+        if await self.session.scalar(stmt) is None:
+            return False
+        await self.session.execute(
+            update(PollOption),
+            [
+                {"id": option.id, "voter_count": result["voter_count"]}
+                for option, result in zip(poll.options, results, strict=True)
+            ],
+        )
+        return True
 
-    def get_poll_option_by_text(
-        self,
-        poll_id: int,
-        text: str,
-    ) -> PollOption | None:
+    async def get_winning_option(self, poll_id: int) -> PollOption | None:
+        """Опция с наибольшим числом голосов, при равенстве — первая."""
         stmt = (
             select(PollOption)
             .where(eq(PollOption.poll_id, poll_id))
-            .where(eq(PollOption.text, text))
+            .where(PollOption.voter_count.is_not(None))
+            .order_by(PollOption.voter_count.desc(), PollOption.id)
+            .limit(1)
         )
-        return self.session.scalars(stmt).first()
+        return (await self.session.scalars(stmt)).first()
@@ -0,0 +1,169 @@
+from collections.abc import Sequence
+from datetime import timedelta
+
+from sqlalchemy import delete, exists, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.operators import eq
+
+from core.infra.db.models.scenario_job import ScenarioJob
+from core.infra.repositories.base import BaseRepository
+
+# Пространство ключей advisory lock, которым сериализуется захват задач
+# одного сценария
+SCENARIO_LOCK_NAMESPACE = 0x6A6F62
+
+# Сколько созревших задач просматривается за одну попытку захвата
+CLAIM_CANDIDATES = 10
+
+
+class ScenarioJobRepository(BaseRepository):
+    async def sync_jobs(
+        self,
+        scenario_name: str,
+        schedules: Sequence[tuple[list[str], float, float]],
+    ) -> None:
+        """Приводит задачи сценария к расписаниям (cycles, interval, delay).
+
+        У существующих задач обновляется только интервал, поэтому
+        перезапуск воркера не сдвигает next_run_at. Задачи расписаний,
+        которых больше нет в настройках, удаляются.
+        """
+        for cycles, interval, delay in schedules:
+            stmt = insert(ScenarioJob).values(
+                scenario_name=scenario_name,
+                cycles=cycles,
+                run_interval=interval,
+                next_run_at=func.now() + timedelta(seconds=delay),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ScenarioJob.scenario_name, ScenarioJob.cycles],
+                set_={"run_interval": stmt.excluded.run_interval},
+            )
+            await self.session.execute(stmt)
+        stmt = (
+            delete(ScenarioJob)
+            .where(eq(ScenarioJob.scenario_name, scenario_name))
+            .where(
+                ScenarioJob.cycles.not_in(
+                    [cycles for cycles, _, _ in schedules],
+                ),
+            )
+        )
+        await self.session.execute(stmt)
+
+    async def claim_job(
+        self,
+        scenario_names: Sequence[str],
+        worker_id: str,
+        lease: timedelta,
+    ) -> ScenarioJob | None:
+        """Берёт в аренду созревшую задачу свободного сценария.
+
+        Строки-кандидаты блокируются с SKIP LOCKED, поэтому воркеры не
+        ждут друг друга. Advisory lock сценария держится до конца
+        транзакции: проверка, что у сценария нет арендованных задач,
+        выполняется уже после его получения и видит аренды, закоммиченные
+        другими воркерами.
+        """
+        now = func.now()
+        stmt = (
+            select(ScenarioJob)
+            .where(ScenarioJob.scenario_name.in_(scenario_names))
+            .where(ScenarioJob.next_run_at <= now)
+            .where(
+                (ScenarioJob.locked_until.is_(None))
+                | (ScenarioJob.locked_until <= now),
+            )
+            .order_by(ScenarioJob.next_run_at)
+            .limit(CLAIM_CANDIDATES)
+            .with_for_update(skip_locked=True)
+        )
+        for job in (await self.session.scalars(stmt)).all():
+            locked = await self.session.scalar(
+                select(
+                    func.pg_try_advisory_xact_lock(
+                        SCENARIO_LOCK_NAMESPACE,
+                        func.hashtext(job.scenario_name),
+                    ),
+                ),
+            )
+            if not locked or await self._is_running(job.scenario_name):
+                continue
+            await self.session.execute(
+                update(ScenarioJob)
+                .where(eq(ScenarioJob.id, job.id))
+                .values(
+                    locked_until=now + lease,
+                    locked_by=worker_id,
+                    last_started_at=now,
+                )
+                .execution_options(synchronize_session=False),
+            )
+            return job
+        return None
+
+    async def _is_running(self, scenario_name: str) -> bool:
+        now = func.now()
+        stmt = select(
+            exists().where(
+                eq(ScenarioJob.scenario_name, scenario_name),
+                ScenarioJob.locked_until > now,
+            ),
+        )
+        return bool(await self.session.scalar(stmt))
+
+    async def extend_lease(
+        self,
+        job_id: int,
+        worker_id: str,
+        lease: timedelta,
+    ) -> bool:
+        stmt = (
+            update(ScenarioJob)
+            .where(eq(ScenarioJob.id, job_id))
+            .where(eq(ScenarioJob.locked_by, worker_id))
+            .values(locked_until=func.now() + lease)
+            .returning(ScenarioJob.id)
+        )
+        return (await self.session.scalar(stmt)) is not None
+
+    async def complete_job(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str | None,
+    ) -> None:
+        """Снимает аренду и переносит next_run_at на следующий слот.
+
+        Слот выбирается первым после текущего момента, поэтому
+        пропущенные из-за долгого выполнения запуски не догоняются.
+        """
+        now = func.now()
+        elapsed = func.extract("epoch", now - ScenarioJob.next_run_at)
+        slots = func.floor(elapsed / ScenarioJob.run_interval) + 1
+        stmt = (
+            update(ScenarioJob)
+            .where(eq(ScenarioJob.id, job_id))
+            .where(eq(ScenarioJob.locked_by, worker_id))
+            .values(
+                next_run_at=ScenarioJob.next_run_at
+                + literal_column("interval '1 second'")
+                * (ScenarioJob.run_interval * slots),
+                locked_until=None,
+                locked_by=None,
+                last_finished_at=now,
+                last_error=error,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
+    async def release_job(self, job_id: int, worker_id: str) -> None:
+        stmt = (
+            update(ScenarioJob)
+            .where(eq(ScenarioJob.id, job_id))
+            .where(eq(ScenarioJob.locked_by, worker_id))
+            .values(locked_until=None, locked_by=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
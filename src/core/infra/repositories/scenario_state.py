@@ -1,30 +1,206 @@
+from collections.abc import Sequence
+from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Float,
+    String,
+    column,
+    literal,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlalchemy.sql.operators import eq
 
+from core.infra.db.models.poll import Poll
 from core.infra.db.models.scenario import ScenarioState
 from core.infra.repositories.base import BaseRepository
 
 
+def aggregate_options() -> tuple[ORMOption, ...]:
+    """Опции загрузки агрегата состояния.
+
+    Опрос с опциями и итогами и сообщения загружаются вместе с ним за
+    три запроса, а ленивые загрузки, которым нужен SQL, запрещены.
+    Опции строятся при вызове: на импорте модуля связи с моделями,
+    которые ещё не импортированы, не разрешаются.
+    """
+    return (
+        joinedload(ScenarioState.poll).joinedload(Poll.result),
+        joinedload(ScenarioState.poll).selectinload(Poll.options),
+        selectinload(ScenarioState.messages),
+        raiseload("*", sql_only=True),
+    )
+
+
 class ScenarioStateRepository(BaseRepository):
-    def add_state(
+    async def add_aggregate(
         self,
         scenario_name: str,
+        parent_id: int | None,
         state_data: dict[str, Any],
+        poll: Poll,
     ) -> ScenarioState:
+        """Добавляет состояние с опросом одним flush."""
         model = ScenarioState(
             scenario_name=scenario_name,
+            parent_id=parent_id,
             state_data=state_data,
+            poll=poll,
         )
         self.session.add(model)
-        self.session.flush()
+        await self.session.flush()
         return model
 
-    def get_latest_state(self, scenario_name: str) -> ScenarioState | None:
+    async def update_state_data(
+        self,
+        state_id: int,
+        state_data: dict[str, Any],
+    ) -> None:
+        stmt = (
+            update(ScenarioState)
+            .where(eq(ScenarioState.id, state_id))
+            .values(state_data=state_data)
+        )
+        await self.session.execute(stmt)
+
+    async def get_latest_state(
+        self,
+        scenario_name: str,
+    ) -> ScenarioState | None:
+        stmt = (
+            select(ScenarioState)
+            .where(eq(ScenarioState.scenario_name, scenario_name))
+            .order_by(ScenarioState.id.desc())
+        )
+        return (await self.session.scalars(stmt)).first()
+
+    async def get_latest_state_id(self, scenario_name: str) -> int | None:
+        stmt = (
+            select(ScenarioState.id)
+            .where(eq(ScenarioState.scenario_name, scenario_name))
+            .order_by(ScenarioState.id.desc())
+            .limit(1)
+        )
+        return (await self.session.scalars(stmt)).first()
+
+    async def get_latest_aggregate(
+        self,
+        scenario_name: str,
+    ) -> ScenarioState | None:
+        """Последнее состояние сценария вместе с опросом и сообщениями."""
+        stmt = (
+            select(ScenarioState)
+            .where(eq(ScenarioState.scenario_name, scenario_name))
+            .order_by(ScenarioState.id.desc())
+            .limit(1)
+            .options(*aggregate_options())
+        )
+        return (await self.session.scalars(stmt)).first()
+
+    async def get_latest_aggregates(
+        self,
+        scenario_names: Sequence[str],
+    ) -> dict[str, ScenarioState]:
+        """Пакетный get_latest_aggregate: те же три запроса на N сценариев.
+
+        Последнее состояние каждого сценария ищется через LATERAL, так
+        что на сценарий читается одна запись индекса, а не вся история.
+        """
+        if not scenario_names:
+            return {}
+        names = values(
+            column("scenario_name", String),
+            name="names",
+        ).data([(name,) for name in scenario_names])
+        latest = (
+            select(ScenarioState.id)
+            .where(eq(ScenarioState.scenario_name, names.c.scenario_name))
+            .order_by(ScenarioState.id.desc())
+            # Литерал, а не параметр: с LIMIT $n generic-план оценивает
+            # LATERAL в десятую часть таблицы и соединяет опросы хешем
+            .limit(literal(1, literal_execute=True))
+            .correlate(names)
+            .lateral("latest")
+        )
+        stmt = (
+            select(ScenarioState)
+            .select_from(names)
+            .join(latest, true())
+            .join(ScenarioState, eq(ScenarioState.id, latest.c.id))
+            .options(*aggregate_options())
+        )
+        return {
+            state.scenario_name: state
+            for state in (await self.session.scalars(stmt)).unique()
+        }
+
+    async def get_field_timeline(
+        self,
+        scenario_name: str,
+        field: str,
+        limit: int,
+    ) -> list[tuple[int, datetime, Any]]:
+        """Значения поля state_data за последние limit состояний.
+
+        Из JSONB извлекается только нужное поле, результат идёт от
+        старых состояний к новым.
+        """
+        latest = (
+            select(
+                ScenarioState.id,
+                ScenarioState.created_at,
+                ScenarioState.state_data[field].label("value"),
+            )
+            .where(eq(ScenarioState.scenario_name, scenario_name))
+            .order_by(ScenarioState.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        stmt = select(latest).order_by(latest.c.id)
+        return [
+            (row.id, row.created_at, row.value)
+            for row in await self.session.execute(stmt)
+        ]
+
+    async def find_states_containing(
+        self,
+        scenario_name: str,
+        fragment: dict[str, Any],
+        limit: int,
+    ) -> list[ScenarioState]:
+        """Последние состояния, state_data которых содержит fragment."""
+        stmt = (
+            select(ScenarioState)
+            .where(eq(ScenarioState.scenario_name, scenario_name))
+            .where(ScenarioState.state_data.contains(fragment))
+            .order_by(ScenarioState.id.desc())
+            .limit(limit)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def find_states_by_price(
+        self,
+        scenario_name: str,
+        min_price: float,
+        max_price: float,
+        limit: int,
+    ) -> list[ScenarioState]:
+        """Последние состояния с current_price в диапазоне включительно."""
+        # Ключ — литерал: с параметром выражение не совпадает с
+        # ix_scenario_states_current_price в generic-плане
+        price = ScenarioState.state_data.op("->>")(
+            literal("current_price", literal_execute=True),
+        ).cast(Float)
         stmt = (
             select(ScenarioState)
             .where(eq(ScenarioState.scenario_name, scenario_name))
+            .where(price.between(min_price, max_price))
             .order_by(ScenarioState.id.desc())
+            .limit(limit)
         )
-        return self.session.scalars(stmt).first()
+        return list(await self.session.scalars(stmt))
@@ -1,49 +1,425 @@
-from typing import TypeVar
+import asyncio
+import hashlib
+import logging
+import time
+
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from functools import cache
+from http import HTTPStatus
+from typing import Any, TypeVar
+
+import httpx
 
 from google import genai
-from google.genai import types
-from pydantic import BaseModel
+from google.genai import errors, types
+from pydantic import BaseModel, TypeAdapter
+
+from core.config.settings import GeminiSettings
+from core.integrations.json_stream import (
+    JSONObjectStreamParser,
+    JSONStreamError,
+)
+from core.integrations.resilience import (
+    CircuitBreakerRegistry,
+    ErrorClassifier,
+    RetryPolicy,
+    call_with_retries,
+)
+
+logger = logging.getLogger(__name__)
 
 T = TypeVar("T", bound=BaseModel)
 
+# Так Gemini отвечает на ссылку на истёкший или удалённый context cache
+CACHE_MISSING_CODES = frozenset({HTTPStatus.NOT_FOUND, HTTPStatus.FORBIDDEN})
+
+
+def is_gemini_failure(error: Exception) -> bool:
+    return isinstance(
+        error,
+        errors.ServerError | httpx.TransportError | TimeoutError,
+    )
+
+
+def is_gemini_retryable(error: Exception) -> bool:
+    if isinstance(error, errors.ClientError):
+        return error.code in {
+            HTTPStatus.REQUEST_TIMEOUT,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        }
+    return is_gemini_failure(error)
+
+
+# Генерация не имеет побочных эффектов, поэтому любой временный сбой
+# можно повторить
+GEMINI_ERROR_CLASSIFIER = ErrorClassifier(
+    should_retry=is_gemini_retryable,
+    is_failure=is_gemini_failure,
+)
+
+
+@dataclass
+class GenerationStats:
+    """Метрики одного вызова, которые клиент заполняет по ходу работы."""
+
+    started_at: float = field(default_factory=time.monotonic)
+    first_chunk_at: float | None = None
+    attempts: int = 0
+    prompt_tokens: int | None = None
+    cached_tokens: int | None = None
+    response_tokens: int | None = None
+    total_tokens: int | None = None
+
+    def add_usage(
+        self,
+        usage: types.GenerateContentResponseUsageMetadata | None,
+    ) -> None:
+        if usage is None:
+            return
+        self.prompt_tokens = usage.prompt_token_count
+        self.cached_tokens = usage.cached_content_token_count
+        self.response_tokens = usage.candidates_token_count
+        self.total_tokens = usage.total_token_count
+
+
+def ordered_response_schema(
+    response_schema_cls: type[BaseModel],
+) -> dict[str, Any]:
+    """JSON-схема ответа, в которой stream_last_fields идут последними.
+
+    SDK упорядочивает свойства по объявлению полей в модели, а при
+    стриминге важно, чтобы медленные поля генерировались в конце.
+    """
+    last_fields = getattr(response_schema_cls, "stream_last_fields", ())
+    schema = response_schema_cls.model_json_schema()
+    names = list(schema["properties"])
+    schema["propertyOrdering"] = [
+        *(name for name in names if name not in last_fields),
+        *(name for name in last_fields if name in names),
+    ]
+    return schema
+
+
+@cache
+def _field_adapter(
+    response_schema_cls: type[BaseModel],
+    name: str,
+) -> TypeAdapter | None:
+    field = response_schema_cls.model_fields.get(name)
+    if field is None:
+        return None
+    return TypeAdapter(field.annotation)
+
+
+@dataclass
+class _CachedInstruction:
+    name: str | None
+    expires_at: float
+
+
+class GeminiContextCache:
+    """Хранит system instruction сценариев в context cache Gemini.
+
+    Кэш создаётся один раз на текст инструкции, то есть на версию
+    промпта, и продлевается, когда до истечения остаётся меньше
+    refresh_margin секунд. Если создать кэш не удалось (например, текст
+    короче минимального размера кэша), инструкция до следующей попытки
+    передаётся в запросе как обычный system_instruction.
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        model: str,
+        ttl: float = 3600,
+        refresh_margin: float = 300,
+    ):
+        self.client = client
+        self.model = model
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._entries: dict[str, _CachedInstruction] = {}
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get_config(self, system_instruction: str) -> dict[str, str]:
+        """Параметры GenerateContentConfig для передачи инструкции."""
+        if self.ttl <= 0:
+            return {"system_instruction": system_instruction}
+        key = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()
+        async with self._locks[key]:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry.expires_at - time.monotonic() <= self.refresh_margin
+            ):
+                entry = await self._refresh(key, entry, system_instruction)
+                self._entries[key] = entry
+        if entry.name is None:
+            return {"system_instruction": system_instruction}
+        return {"cached_content": entry.name}
+
+    def invalidate(self, name: str) -> None:
+        for key, entry in list(self._entries.items()):
+            if entry.name == name:
+                del self._entries[key]
+
+    async def _refresh(
+        self,
+        key: str,
+        entry: _CachedInstruction | None,
+        system_instruction: str,
+    ) -> _CachedInstruction:
+        expires_at = time.monotonic() + self.ttl
+        ttl = f"{int(self.ttl)}s"
+        if entry is not None and entry.name is not None:
+            try:
+                await self.client.aio.caches.update(
+                    name=entry.name,
+                    config=types.UpdateCachedContentConfig(ttl=ttl),
+                )
+            except (errors.APIError, httpx.TransportError) as e:
+                logger.warning(f"Failed to extend {entry.name}: {e}")
+            else:
+                return _CachedInstruction(
+                    name=entry.name,
+                    expires_at=expires_at,
+                )
+
+        try:
+            cached = await self.client.aio.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    ttl=ttl,
+                    display_name=f"votale-{key[:12]}",
+                ),
+            )
+        except (errors.APIError, httpx.TransportError) as e:
+            logger.warning(
+                f"Context cache unavailable, sending system instruction "
+                f"inline: {e}",
+            )
+            return _CachedInstruction(name=None, expires_at=expires_at)
+        logger.info(f"Created context cache {cached.name}")
+        return _CachedInstruction(name=cached.name, expires_at=expires_at)
 
-class GeminiClient:
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        self.api_key = api_key
+
+class AsyncGeminiClient:
+    """Клиент Gemini поверх aio-клиента SDK.
+
+    Число одновременных запросов клиента ограничено max_concurrency;
+    слот занимает только сама попытка, а не паузы между ретраями.
+    Каждая попытка прерывается через request_timeout секунд, а все
+    попытки вызова вместе с паузами — через call_deadline.
+    Статическая system instruction отправляется через context cache.
+    """
+
+    def __init__(
+        self,
+        settings: GeminiSettings,
+        model: str | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        call_deadline: float | None = None,
+    ):
+        self.api_key = settings.api_key
 
         if not self.api_key:
-            raise ValueError("API key is required for GeminiClient.")
+            raise ValueError("API key is required for AsyncGeminiClient.")
 
         self.client = genai.Client(api_key=self.api_key)
-        self.model = model
+        self.model = model or settings.model
+        self.request_timeout = settings.request_timeout
+        self.call_deadline = call_deadline
+        self.context_cache = GeminiContextCache(
+            client=self.client,
+            model=self.model,
+            ttl=settings.context_cache_ttl,
+        )
+        self._semaphore = asyncio.Semaphore(settings.max_concurrency)
+        self._retry_policy = RetryPolicy(max_attempts=settings.max_attempts)
+        self._breakers = breakers or CircuitBreakerRegistry()
+
+    async def _with_instruction(
+        self,
+        config: types.GenerateContentConfig,
+        system_instruction: str | None,
+    ) -> types.GenerateContentConfig:
+        if system_instruction is None:
+            return config
+        return config.model_copy(
+            update=await self.context_cache.get_config(system_instruction),
+        )
+
+    async def _generate_content(
+        self,
+        prompt: str,
+        config: types.GenerateContentConfig,
+        stats: GenerationStats | None = None,
+        system_instruction: str | None = None,
+    ) -> types.GenerateContentResponse:
+        stats = stats or GenerationStats()
+        async with asyncio.timeout(self.call_deadline):
+            config = await self._with_instruction(config, system_instruction)
+            try:
+                return await self._request(prompt, config, stats)
+            except errors.ClientError as e:
+                if (
+                    config.cached_content is None
+                    or e.code not in CACHE_MISSING_CODES
+                ):
+                    raise
+                logger.warning(
+                    f"{config.cached_content} is gone, sending system "
+                    "instruction inline",
+                )
+                self.context_cache.invalidate(config.cached_content)
+                config = config.model_copy(
+                    update={
+                        "cached_content": None,
+                        "system_instruction": system_instruction,
+                    },
+                )
+                return await self._request(prompt, config, stats)
+
+    async def _request(
+        self,
+        prompt: str,
+        config: types.GenerateContentConfig,
+        stats: GenerationStats,
+    ) -> types.GenerateContentResponse:
 
-    def generate_text_raw(
+        async def attempt() -> types.GenerateContentResponse:
+            async with self._semaphore:
+                stats.attempts += 1
+                return await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=config,
+                    ),
+                    timeout=self.request_timeout,
+                )
+
+        response = await call_with_retries(
+            attempt,
+            policy=self._retry_policy,
+            breaker=self._breakers.get(f"gemini:{self.model}"),
+            classifier=GEMINI_ERROR_CLASSIFIER,
+        )
+        stats.add_usage(response.usage_metadata)
+        return response
+
+    async def generate_text_raw(
         self,
         prompt: str,
         *,
         temperature: float = 1,
+        stats: GenerationStats | None = None,
     ) -> str:
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
+        response = await self._generate_content(
+            prompt=prompt,
             config=types.GenerateContentConfig(temperature=temperature),
+            stats=stats,
         )
         return response.text
 
-    def generate_structured(
+    async def generate_structured(
         self,
         prompt: str,
         response_schema_cls: type[T],
         *,
+        system_instruction: str | None = None,
         temperature: float = 1,
+        stats: GenerationStats | None = None,
     ) -> T:
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
+        response = await self._generate_content(
+            prompt=prompt,
             config=types.GenerateContentConfig(
                 response_mime_type="application/json",
                 response_schema=response_schema_cls,
                 temperature=temperature,
             ),
+            stats=stats,
+            system_instruction=system_instruction,
         )
         return response.parsed
+
+    async def stream_structured(
+        self,
+        prompt: str,
+        response_schema_cls: type[T],
+        *,
+        system_instruction: str | None = None,
+        temperature: float = 1,
+        stats: GenerationStats | None = None,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Отдаёт поля ответа по одному, как только каждое из них готово.
+
+        Значение поля валидируется по его аннотации в схеме; целиком
+        ответ валидирует вызывающий код. Частично прочитанный поток
+        нельзя безопасно повторить, поэтому ретраев здесь нет, а
+        request_timeout ограничивает весь поток, а не отдельный чанк.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        breaker = self._breakers.get(f"gemini:{self.model}")
+        config = await self._with_instruction(
+            types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=ordered_response_schema(response_schema_cls),
+                temperature=temperature,
+            ),
+            system_instruction=system_instruction,
+        )
+        parser = JSONObjectStreamParser()
+        stats = stats or GenerationStats()
+        async with self._semaphore:
+            stats.attempts += 1
+            with breaker.guard(GEMINI_ERROR_CLASSIFIER.is_failure):
+                try:
+                    stream = await asyncio.wait_for(
+                        self.client.aio.models.generate_content_stream(
+                            model=self.model,
+                            contents=prompt,
+                            config=config,
+                        ),
+                        timeout=deadline - loop.time(),
+                    )
+                    chunks = aiter(stream)
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                anext(chunks),
+                                timeout=deadline - loop.time(),
+                            )
+                        except StopAsyncIteration:
+                            break
+                        if stats.first_chunk_at is None:
+                            stats.first_chunk_at = time.monotonic()
+                        stats.add_usage(chunk.usage_metadata)
+                        if not chunk.text:
+                            continue
+                        for name, raw_value in parser.feed(chunk.text):
+                            adapter = _field_adapter(
+                                response_schema_cls,
+                                name,
+                            )
+                            yield name, (
+                                raw_value
+                                if adapter is None
+                                else adapter.validate_python(raw_value)
+                            )
+                    if not parser.finished:
+                        raise JSONStreamError(
+                            "Stream ended before the response object "
+                            "was closed",
+                        )
+                except errors.ClientError as e:
+                    if (
+                        e.code in CACHE_MISSING_CODES
+                        and config.cached_content is not None
+                    ):
+                        self.context_cache.invalidate(config.cached_content)
+                    raise
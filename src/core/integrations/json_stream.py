@@ -0,0 +1,84 @@
+import json
+
+from collections.abc import Iterator
+from typing import Any
+
+
+class JSONStreamError(ValueError):
+    """Raised when the stream is not a single top-level JSON object."""
+
+
+class JSONObjectStreamParser:
+    """Инкрементальный разбор JSON-объекта верхнего уровня.
+
+    Текст подаётся кусками через feed(), который возвращает поля объекта
+    по мере того, как их значения становятся полными. В памяти хранится
+    только текст поля, которое разбирается в данный момент.
+    """
+
+    def __init__(self):
+        self._member: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._finished = False
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        return list(self._feed(chunk))
+
+    def _feed(self, chunk: str) -> Iterator[tuple[str, Any]]:
+        for char in chunk:
+            if self._in_string:
+                self._feed_string(char)
+            elif self._depth == 0:
+                self._open_object(char)
+            elif self._depth == 1 and char in ",}":
+                member = "".join(self._member).strip()
+                self._member.clear()
+                if member:
+                    yield self._parse_member(member)
+                if char == "}":
+                    self._depth = 0
+                    self._finished = True
+            else:
+                self._member.append(char)
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+
+    def _feed_string(self, char: str) -> None:
+        self._member.append(char)
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+
+    def _open_object(self, char: str) -> None:
+        if char.isspace():
+            return
+        if char != "{" or self._started:
+            raise JSONStreamError(
+                f"Unexpected character {char!r} outside of object",
+            )
+        self._started = True
+        self._depth = 1
+
+    @staticmethod
+    def _parse_member(member: str) -> tuple[str, Any]:
+        try:
+            parsed = json.loads(f"{{{member}}}")
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid object member: {e}") from e
+        if len(parsed) != 1:
+            raise JSONStreamError(f"Invalid object member: {member[:50]}")
+        return next(iter(parsed.items()))
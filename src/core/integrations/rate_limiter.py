@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Сколько секунд осталось до появления свободного токена."""
+        self._refill(now)
+        blocked = max(0, self._blocked_until - now)
+        if self._tokens >= 1:
+            return blocked
+        return max(blocked, (1 - self._tokens) / self.rate)
+
+    def consume(self) -> None:
+        self._tokens -= 1
+
+    def block(self, now: float, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0
+        self._updated_at = max(self._updated_at, now + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        return self.wait_time(now) == 0 and self._tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_id: int | str | None = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class TelegramRateLimiter:
+    """Общий планировщик исходящих запросов к Bot API.
+
+    Запрос получает слот, когда есть токен и в глобальном бакете бота,
+    и в бакете конкретного чата. Ожидающие обслуживаются по приоритету,
+    а чат, упёршийся в свой лимит, не задерживает остальные чаты.
+    """
+
+    MAX_IDLE_BUCKETS = 10_000
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        global_burst: float = 30,
+        chat_rate: float = 20 / 60,
+        chat_burst: float = 3,
+    ):
+        self._global = TokenBucket(rate=global_rate, capacity=global_burst)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                self._evict_idle_buckets()
+            bucket = TokenBucket(
+                rate=self._chat_rate,
+                capacity=self._chat_burst,
+            )
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _evict_idle_buckets(self) -> None:
+        now = time.monotonic()
+        busy = {waiter.chat_id for waiter in self._waiters}
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if chat_id not in busy and bucket.is_idle(now):
+                del self._chat_buckets[chat_id]
+
+    async def acquire(
+        self,
+        chat_id: int | str | None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            _Waiter(
+                priority=priority,
+                seq=next(self._seq),
+                chat_id=chat_id,
+                future=future,
+            ),
+        )
+        self._dispatch()
+        await future
+
+    def pause(self, chat_id: int | str | None, seconds: float) -> None:
+        """Блокирует чат (или весь бот) на время из retry_after."""
+        now = time.monotonic()
+        if chat_id is None:
+            self._global.block(now, seconds)
+        else:
+            self._chat_bucket(chat_id).block(now, seconds)
+        logger.warning(f"Flood control: chat {chat_id} paused for {seconds}s")
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        next_wakeup: float | None = None
+        remaining: list[_Waiter] = []
+        for waiter in sorted(self._waiters):
+            if waiter.future.done():
+                continue
+            global_wait = self._global.wait_time(now)
+            chat_wait = (
+                0
+                if waiter.chat_id is None
+                else self._chat_bucket(waiter.chat_id).wait_time(now)
+            )
+            wait = max(global_wait, chat_wait)
+            if wait == 0:
+                self._global.consume()
+                if waiter.chat_id is not None:
+                    self._chat_buckets[waiter.chat_id].consume()
+                waiter.future.set_result(None)
+                continue
+            remaining.append(waiter)
+            next_wakeup = wait if next_wakeup is None else min(
+                next_wakeup,
+                wait,
+            )
+
+        self._waiters = remaining
+        heapq.heapify(self._waiters)
+        if next_wakeup is not None:
+            self._timer = asyncio.get_running_loop().call_later(
+                next_wakeup,
+                self._dispatch,
+            )
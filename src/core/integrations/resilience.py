@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import random
+import time
+
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Джиттер не требует криптостойкости, но SystemRandom не делит
+# состояние с глобальным random и не зависит от его seed
+_jitter = random.SystemRandom()
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(
+            f"Circuit '{name}' is open, retry in {retry_in:.1f}s",
+        )
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Размыкает цепь после failure_threshold ошибок подряд.
+
+    Пока цепь разомкнута, вызовы сразу падают с CircuitOpenError.
+    Через recovery_timeout пропускается один пробный вызов: успех
+    замыкает цепь, ошибка снова размыкает её.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def before_call(self) -> None:
+        if self._state == CircuitState.CLOSED:
+            return
+        retry_in = self._opened_at + self.recovery_timeout - (
+            time.monotonic()
+        )
+        if self._state == CircuitState.OPEN and retry_in <= 0:
+            self._state = CircuitState.HALF_OPEN
+            logger.info(f"Circuit '{self.name}' half-open, probing")
+            return
+        raise CircuitOpenError(self.name, retry_in=max(0, retry_in))
+
+    def record_success(self) -> None:
+        if self._state != CircuitState.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self._failures >= self.failure_threshold
+        ):
+            if self._state != CircuitState.OPEN:
+                logger.warning(
+                    f"Circuit '{self.name}' opened after "
+                    f"{self._failures} failures",
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Возвращает цепь в OPEN, если пробный вызов не дал исхода.
+
+        _opened_at не меняется, поэтому следующий вызов сразу станет
+        новым пробным.
+        """
+        if self._state == CircuitState.HALF_OPEN:
+            self._state = CircuitState.OPEN
+
+    @contextmanager
+    def guard(
+        self,
+        is_failure: Callable[[Exception], bool],
+    ) -> Iterator[None]:
+        """Пропускает вызов через цепь и записывает его исход.
+
+        Отмена задачи или закрытие генератора посреди вызова ничего
+        не говорят о зависимости, поэтому пробный вызов освобождается,
+        а не остаётся висеть в HALF_OPEN.
+        """
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_success()
+
+
+class CircuitBreakerRegistry:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name=name,
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10
+    multiplier: float = 2
+
+    def backoff(self, attempt: int) -> float:
+        """Экспоненциальная задержка с full jitter; attempt считается с 1."""
+        ceiling = min(
+            self.max_delay,
+            self.base_delay * self.multiplier ** (attempt - 1),
+        )
+        return _jitter.uniform(0, ceiling)
+
+
+@dataclass(frozen=True)
+class ErrorClassifier:
+    """Решает, что делать с ошибкой вызова.
+
+    should_retry — можно ли безопасно повторить вызов;
+    is_failure — считается ли ошибка признаком нездоровья зависимости
+    (ошибки клиента вроде 400 цепь не размыкают).
+    """
+    should_retry: Callable[[Exception], bool]
+    is_failure: Callable[[Exception], bool]
+
+
+async def call_with_retries(
+    func: Callable[[], Awaitable[T]],
+    *,
+    policy: RetryPolicy,
+    breaker: CircuitBreaker,
+    classifier: ErrorClassifier,
+) -> T:
+    attempt = 1
+    while True:
+        try:
+            with breaker.guard(classifier.is_failure):
+                return await func()
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if attempt >= policy.max_attempts or not classifier.should_retry(
+                e,
+            ):
+                raise
+            delay = policy.backoff(attempt)
+            logger.warning(
+                f"Call via '{breaker.name}' failed "
+                f"(attempt {attempt}/{policy.max_attempts}), "
+                f"retrying in {delay:.2f}s: {e}",
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -1,15 +1,29 @@
+import asyncio
 import json
 import logging
 
+from http import HTTPStatus
 from typing import Any
 
-import requests
+import httpx
+
+from core.config.settings import TelegramSettings
+from core.integrations.rate_limiter import Priority, TelegramRateLimiter
+from core.integrations.resilience import (
+    CircuitBreakerRegistry,
+    ErrorClassifier,
+    RetryPolicy,
+    call_with_retries,
+)
 
 logger = logging.getLogger(__name__)
 
+# Сколько секунд простаивающее keep-alive соединение остаётся в пуле
+KEEPALIVE_EXPIRY = 30
+
 
 class TelegramClientError(Exception):
-    """Custom exception for errors during Telegram posting using requests."""
+    """Custom exception for errors during Telegram posting."""
 
     def __init__(
         self,
@@ -21,70 +35,188 @@ class TelegramClientError(Exception):
         self.status_code = status_code
         self.response_data = response_data
 
+    @property
+    def retry_after(self) -> int | None:
+        if not self.response_data:
+            return None
+        parameters = self.response_data.get("parameters") or {}
+        return parameters.get("retry_after")
+
+
+class TelegramNetworkError(TelegramClientError):
+    """Transport-level failure; request_sent tells if it may have arrived."""
+
+    def __init__(self, message: str, *, request_sent: bool):
+        super().__init__(message)
+        self.request_sent = request_sent
+
+
+# Методы, повтор которых не создаёт дублей в чате
+IDEMPOTENT_METHODS = frozenset({"stopPoll"})
+
+
+def is_telegram_failure(error: Exception) -> bool:
+    if isinstance(error, TelegramNetworkError):
+        return True
+    if isinstance(error, TelegramClientError):
+        return (error.status_code or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+    return False
+
+
+def telegram_error_classifier(method_name: str) -> ErrorClassifier:
+    if method_name in IDEMPOTENT_METHODS:
+        return ErrorClassifier(
+            should_retry=is_telegram_failure,
+            is_failure=is_telegram_failure,
+        )
+    # sendMessage/sendPoll повторяем, только если запрос точно не ушёл
+    return ErrorClassifier(
+        should_retry=lambda e: (
+            isinstance(e, TelegramNetworkError) and not e.request_sent
+        ),
+        is_failure=is_telegram_failure,
+    )
+
+
+def validate_poll(question: str, options: list[str]) -> None:
+    question_min_length = 1
+    question_max_length = 300
+    min_options = 2
+    max_options = 10
+    # Валидация базовых параметров
+    if not (min_options <= len(options) <= max_options):
+        msg = (
+            f"Poll must have between 2 and 10 options, got {len(options)}."
+        )
+        logger.error(msg)
+        raise TelegramClientError(msg)
+    if not (question_min_length <= len(question) <= question_max_length):
+        msg = (f"Poll question length must be between 1 and 300 chars, "
+               f"got {len(question)}.")
+        logger.error(msg)
+        raise TelegramClientError(msg)
+
+
+class AsyncTelegramClient:
+    """Асинхронный клиент Telegram Bot API.
+
+    Один httpx.AsyncClient держит пул keep-alive соединений к Bot API,
+    поэтому запросы в разные чаты могут выполняться параллельно.
+    """
 
-class TelegramClient:
     BASE_API_URL = "https://api.telegram.org/bot"
 
-    def __init__(self, token: str, request_timeout: int = 10):
-        if not token:
+    def __init__(
+        self,
+        settings: TelegramSettings,
+        rate_limiter: TelegramRateLimiter | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+    ):
+        if not settings.token:
             raise ValueError("Telegram bot token cannot be empty.")
-        self._token = token
+        self._token = settings.token
         self._base_url = f"{self.BASE_API_URL}{self._token}/"
-        self._timeout = request_timeout
-        self._session = requests.Session()
-        self._session.headers["Content-Type"] = "application/json"
+        self._client = httpx.AsyncClient(
+            base_url=self._base_url,
+            timeout=settings.request_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        self._rate_limiter = rate_limiter
+        self._max_flood_retries = settings.max_flood_retries
+        self._retry_policy = RetryPolicy(max_attempts=settings.max_attempts)
+        self._breakers = breakers or CircuitBreakerRegistry()
 
         self._parse_mode = "HTML"
-        logger.info("Telegram Poster (requests) initialized.")
+        logger.info("Telegram Poster (httpx) initialized.")
 
-    def _make_request(
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def _make_request(
         self,
         method_name: str,
         data: dict[str, Any],
+        priority: Priority = Priority.NORMAL,
     ) -> dict[str, Any]:
-        url = f"{self._base_url}{method_name}"
-        try:
-            response = self._session.post(
-                url,
-                json=data,
-                timeout=self._timeout,
-            )
-            response.raise_for_status()
-            response_data = response.json()
+        return await call_with_retries(
+            lambda: self._send_throttled(
+                method_name,
+                data=data,
+                priority=priority,
+            ),
+            policy=self._retry_policy,
+            breaker=self._breakers.get(f"telegram:{method_name}"),
+            classifier=telegram_error_classifier(method_name),
+        )
 
-            if response_data.get("ok"):
-                logger.debug(
-                    f"Request successful. Response result: "
-                    f"{response_data.get('result')}",
+    async def _send_throttled(
+        self,
+        method_name: str,
+        data: dict[str, Any],
+        priority: Priority,
+    ) -> dict[str, Any]:
+        chat_id = data.get("chat_id")
+        flood_retries = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire(
+                    chat_id=chat_id,
+                    priority=priority,
                 )
-                return response_data.get("result", {})
-            error_description = response_data.get(
-                "description",
-                "Unknown API error",
-            )
-            error_code = response_data.get("error_code")
-            logger.error(
-                f"Telegram API error: {error_description} "
-                f"(Code: {error_code})",
-            )
-            raise TelegramClientError(
-                f"Telegram API error: {error_description}",
-                status_code=response.status_code,
-                response_data=response_data,
-            )
-        except requests.exceptions.Timeout as e:
+            try:
+                return await self._send(method_name, data=data)
+            except TelegramClientError as e:
+                if (
+                    e.retry_after is None
+                    or flood_retries >= self._max_flood_retries
+                ):
+                    raise
+                flood_retries += 1
+                logger.warning(
+                    f"Flood control on {method_name} for chat_id {chat_id}, "
+                    f"retry after {e.retry_after}s",
+                )
+                if self._rate_limiter is not None:
+                    self._rate_limiter.pause(chat_id, e.retry_after)
+                else:
+                    await asyncio.sleep(e.retry_after)
+
+    async def _send(
+        self,
+        method_name: str,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        try:
+            response = await self._client.post(method_name, json=data)
+            response_data = response.json()
+        except (
+            httpx.ConnectError,
+            httpx.ConnectTimeout,
+            httpx.PoolTimeout,
+        ) as e:
+            logger.exception(f"Connection error calling {method_name}")
+            raise TelegramNetworkError(
+                f"Connection failed: {e}",
+                request_sent=False,
+            ) from e
+        except httpx.TimeoutException as e:
             logger.exception(
                 f"Request timeout error calling {method_name}",
             )
-            raise TelegramClientError(f"Request timed out: {e}") from e
-        except requests.exceptions.RequestException as e:
+            raise TelegramNetworkError(
+                f"Request timed out: {e}",
+                request_sent=True,
+            ) from e
+        except httpx.HTTPError as e:
             logger.exception(f"Request error calling {method_name}")
-            status_code = (
-                e.response.status_code if e.response is not None else None
-            )
-            raise TelegramClientError(
+            raise TelegramNetworkError(
                 f"Network or request error: {e}",
-                status_code=status_code,
+                request_sent=True,
             ) from e
         except json.JSONDecodeError as e:
             logger.exception(
@@ -92,21 +224,34 @@ class TelegramClient:
             )
             raise TelegramClientError(
                 f"Invalid JSON response received: {e}",
+                status_code=response.status_code,
             ) from e
-        except Exception as e:
-            # Перехват других неожиданных ошибок
-            logger.exception(
-                f"An unexpected error occurred during "
-                f"request to {method_name}",
+
+        if response_data.get("ok"):
+            logger.debug(
+                f"Request successful. Response result: "
+                f"{response_data.get('result')}",
             )
-            raise TelegramClientError(
-                f"An unexpected error occurred: {e}",
-            ) from e
+            return response_data.get("result", {})
+        error_description = response_data.get(
+            "description",
+            "Unknown API error",
+        )
+        error_code = response_data.get("error_code")
+        logger.error(
+            f"Telegram API error: {error_description} (Code: {error_code})",
+        )
+        raise TelegramClientError(
+            f"Telegram API error: {error_description}",
+            status_code=response.status_code,
+            response_data=response_data,
+        )
 
-    def stop_poll(
+    async def stop_poll(
         self,
         chat_id: int | str,
         message_id: int,
+        priority: Priority = Priority.NORMAL,
         **kwargs,
     ) -> dict[str, Any]:
         payload = {
@@ -117,30 +262,21 @@ class TelegramClient:
         logger.info(
             f"Stopping poll with message_id {message_id} in chat_id {chat_id}",
         )
-        result = self._make_request("stopPoll", data=payload)
+        result = await self._make_request(
+            "stopPoll",
+            data=payload,
+            priority=priority,
+        )
         logger.info(f"Poll stopped successfully for message_id {message_id}")
         return result
 
-    def send_message(
+    async def send_message(
         self,
         chat_id: int | str,
         text: str,
+        priority: Priority = Priority.NORMAL,
         **kwargs,
     ) -> dict[str, Any]:
-        """
-        Отправляет текстовое сообщение в указанный чат. (Синхронно)
-
-        Args:
-            chat_id: Уникальный идентификатор целевого чата или username.
-            text: Текст сообщения.
-            **kwargs: Дополнительные параметры для API метода sendMessage.
-
-        Returns:
-            Словарь, представляющий объект Message из ответа API.
-
-        Raises:
-            TelegramPostingError: В случае ошибки.
-        """
         payload = {
             "chat_id": chat_id,
             "text": text,
@@ -148,37 +284,26 @@ class TelegramClient:
             **kwargs,
         }
         logger.info(f"Sending message to chat_id: {chat_id}")
-        result = self._make_request("sendMessage", data=payload)
+        result = await self._make_request(
+            "sendMessage",
+            data=payload,
+            priority=priority,
+        )
         logger.info(
             f"Message sent successfully to chat_id: {chat_id} "
             f"(Message ID: {result.get('message_id')})",
         )
         return result
 
-    def send_poll(
+    async def send_poll(
         self,
         chat_id: int | str,
         question: str,
         options: list[str],
+        priority: Priority = Priority.NORMAL,
         **kwargs,
     ) -> dict[str, Any]:
-        question_min_length = 1
-        question_max_length = 300
-        min_options = 2
-        max_options = 10
-        # Валидация базовых параметров
-        if not (min_options <= len(options) <= max_options):
-            msg = (
-                f"Poll must have between 2 and 10 options, got {len(options)}."
-            )
-            logger.error(msg)
-            raise TelegramClientError(msg)
-        if not (question_min_length <= len(question) <= question_max_length):
-            msg = (f"Poll question length must be between 1 and 300 chars, "
-                   f"got {len(question)}.")
-            logger.error(msg)
-            raise TelegramClientError(msg)
-
+        validate_poll(question=question, options=options)
         payload = {
             "chat_id": chat_id,
             "question": question,
@@ -190,7 +315,11 @@ class TelegramClient:
         logger.info(
             f"Sending poll to chat_id: {chat_id} with question: '{question}'",
         )
-        result = self._make_request("sendPoll", data=payload)
+        result = await self._make_request(
+            "sendPoll",
+            data=payload,
+            priority=priority,
+        )
         logger.info(
             f"Poll sent successfully to chat_id: {chat_id} "
             f"(Message ID: {result.get('message_id')})",
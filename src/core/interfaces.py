@@ -2,7 +2,8 @@ from abc import abstractmethod
 from typing import Protocol
 
 from core.config.scenarios import ScenarioSettings
-from core.engine.prompt_manager import PromptManager
+from core.engine.context_builder import ContextBuilder
+from core.engine.prompt_manager import PromptManager, RenderedPrompt
 from core.schemas import BaseState
 
 
@@ -12,16 +13,23 @@ class ScenarioProtocol(Protocol):
     Сценарий отвечает за:
       — свои настройки (settings),
       — управление шаблоном (prompt_manager),
+      — сериализацию данных в промпт в пределах бюджета
+        (context_builder),
       — сборку запросов к LLM (initialize_prompt / next_state_prompt),
+      — набор полей состояния, которые передаются в промпт
+        (context_fields, в порядке важности: урезаются с конца),
       — формирование контента для публикаций (build_*).
     """
     settings: ScenarioSettings
     prompt_manager: PromptManager
+    context_builder: ContextBuilder
+    context_fields: tuple[str, ...]
 
     def __init__(
         self,
         settings: ScenarioSettings,
         prompt_manager: PromptManager,
+        context_builder: ContextBuilder,
     ):
         ...
 
@@ -41,17 +49,19 @@ class ScenarioProtocol(Protocol):
         """
 
     @abstractmethod
-    def initialize_prompt(self) -> str:
+    def initialize_prompt(self) -> RenderedPrompt:
         """
-        Составляет и возвращает текст промпта для первого шага,
+        Составляет и возвращает промпт для первого шага,
         когда previous_state отсутствует.
         """
 
     @abstractmethod
-    def next_state_prompt(self) -> str:
+    def next_state_prompt(self) -> RenderedPrompt:
         """
-        Составляет и возвращает текст промпта для генерации следующего
+        Составляет и возвращает промпт для генерации следующего
         состояния мира, когда есть previous_state и выбранная опция.
+        Если передана memory — летопись всей предыдущей истории, —
+        она тоже попадает в промпт.
         """
 
     @abstractmethod
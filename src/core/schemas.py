@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import ClassVar, Literal
 
 from pydantic import BaseModel
 
@@ -13,6 +13,10 @@ class Option(BaseModel):
 
 
 class BaseState(BaseModel):
+    # При стриминге эти поля-списки генерируются последними: пост и опрос
+    # от них не зависят и уходят в чат, пока модель дописывает новости
+    stream_last_fields: ClassVar[tuple[str, ...]] = ("news",)
+
     id: int | None = None
     title: str
     text: str
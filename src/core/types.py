@@ -4,3 +4,32 @@ from enum import StrEnum
 class MessageType(StrEnum):
     STATE = "state"
     POLL = "poll"
+    NEWS = "news"
+
+
+class OutboxStatus(StrEnum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class CycleRunStatus(StrEnum):
+    STARTED = "started"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CycleStage(StrEnum):
+    WINNER_RESOLVED = "winner_resolved"
+    STATE_GENERATED = "state_generated"
+    SUMMARY_GENERATED = "summary_generated"
+    RECORDED = "recorded"
+
+
+class CycleType(StrEnum):
+    TICK = "tick"
+    POLL = "poll"
+    GENERATION = "generation"
+    SPECULATION = "speculation"
+    MEMORY = "memory"
+    NEWS = "news"
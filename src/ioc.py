@@ -1,33 +1,60 @@
-import os
-
-from collections.abc import Iterable
+from collections.abc import AsyncIterable, Mapping
+from datetime import timedelta
 
 from dishka import Provider, Scope, from_context, provide
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
 
 from core.config.scenarios import ScenarioSettings
 from core.config.settings import (
     AppSettings,
+    CircuitBreakerSettings,
     GeminiSettings,
+    LLMCacheSettings,
+    OutboxSettings,
     PostgresSettings,
+    SchedulerSettings,
     TelegramSettings,
 )
+from core.engine.context_builder import ContextBuilder
+from core.engine.cycle_run_manager import CycleRunManager
+from core.engine.llm_cache import LLMResponseCache
+from core.engine.llm_telemetry import LLMTelemetry
+from core.engine.memory_manager import MemoryManager
+from core.engine.outbox_dispatcher import OutboxDispatcher
 from core.engine.poll_manager import PollManager
-from core.engine.prompt_manager import PromptManager
+from core.engine.prompt_manager import PromptManager, PromptRegistry
 from core.engine.publication_manager import PublicationManager
-from core.engine.scenario_manager import ScenarioManager
+from core.engine.scenario_manager import (
+    ScenarioDataManagers,
+    ScenarioManager,
+)
 from core.engine.state_manager import StateManager
-from core.infra.db.database import new_session_maker
+from core.infra.db.database import new_engine, new_session_maker
+from core.infra.db.pool_metrics import PoolMetrics
 from core.infra.db.transaction_manager import TransactionManager
+from core.infra.repositories.candidate import StateCandidateRepository
+from core.infra.repositories.cycle_run import CycleRunRepository
+from core.infra.repositories.memory import ScenarioMemoryRepository
 from core.infra.repositories.message import MessageRepository
+from core.infra.repositories.outbox import OutboxRepository
 from core.infra.repositories.poll import PollRepository
 from core.infra.repositories.scenario_state import (
     ScenarioStateRepository,
 )
-from core.integrations.gemini import GeminiClient
-from core.integrations.telegram import TelegramClient
+from core.integrations.gemini import AsyncGeminiClient
+from core.integrations.rate_limiter import TelegramRateLimiter
+from core.integrations.resilience import CircuitBreakerRegistry
+from core.integrations.telegram import AsyncTelegramClient
 from core.interfaces import ScenarioProtocol
 
+# Доля аренды задачи, которую может занять один вызов LLM со всеми
+# ретраями: остаток нужен циклу, чтобы записать результат
+LLM_CALL_LEASE_SHARE = 0.8
+
 
 class AppProvider(Provider):
     scope = Scope.REQUEST
@@ -54,114 +81,270 @@ class AppProvider(Provider):
     ) -> TelegramSettings:
         return settings.telegram
 
+    @provide(scope=Scope.APP)
+    def get_scheduler_settings(
+        self,
+        settings: AppSettings,
+    ) -> SchedulerSettings:
+        return settings.scheduler
+
+    @provide(scope=Scope.APP)
+    def get_outbox_settings(
+        self,
+        settings: AppSettings,
+    ) -> OutboxSettings:
+        return settings.outbox
+
+    @provide(scope=Scope.APP)
+    def get_circuit_breaker_settings(
+        self,
+        settings: AppSettings,
+    ) -> CircuitBreakerSettings:
+        return settings.circuit_breaker
+
+    @provide(scope=Scope.APP)
+    def get_llm_cache_settings(
+        self,
+        settings: AppSettings,
+    ) -> LLMCacheSettings:
+        return settings.llm_cache
+
 
 class DatabaseProvider(Provider):
     scope = Scope.REQUEST
 
     @provide(scope=Scope.APP)
-    def get_session_maker(
+    async def get_engine(
         self,
         settings: PostgresSettings,
-    ) -> sessionmaker[Session]:
-        return new_session_maker(settings)
+    ) -> AsyncIterable[AsyncEngine]:
+        engine = new_engine(settings)
+        yield engine
+        await engine.dispose()
+
+    @provide(scope=Scope.APP)
+    def get_pool_metrics(
+        self,
+        engine: AsyncEngine,
+        settings: PostgresSettings,
+    ) -> PoolMetrics:
+        return PoolMetrics(
+            engine=engine,
+            capacity=(
+                None
+                if settings.pgbouncer
+                else settings.pool_size + settings.max_overflow
+            ),
+        )
+
+    @provide(scope=Scope.APP)
+    def get_session_maker(
+        self,
+        engine: AsyncEngine,
+    ) -> async_sessionmaker[AsyncSession]:
+        return new_session_maker(engine)
 
     @provide(scope=Scope.REQUEST)
-    def get_session(
+    async def get_session(
         self,
-        session_maker: sessionmaker[Session],
-    ) -> Iterable[Session]:
-        with session_maker() as session:
+        session_maker: async_sessionmaker[AsyncSession],
+    ) -> AsyncIterable[AsyncSession]:
+        async with session_maker() as session:
             yield session
 
+    @provide(scope=Scope.APP)
+    def get_llm_response_cache(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        settings: LLMCacheSettings,
+    ) -> LLMResponseCache:
+        return LLMResponseCache(
+            session_maker=session_maker,
+            ttl=timedelta(seconds=settings.ttl),
+            max_entries=settings.max_entries,
+        )
+
+    @provide(scope=Scope.APP)
+    def get_llm_telemetry(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        settings: GeminiSettings,
+    ) -> LLMTelemetry:
+        return LLMTelemetry(
+            session_maker=session_maker,
+            input_price=settings.input_price,
+            output_price=settings.output_price,
+        )
+
     @provide(scope=Scope.REQUEST)
     def get_transaction_manager(
         self,
-        session: Session,
+        session: AsyncSession,
     ) -> TransactionManager:
         return TransactionManager(session=session)
 
     @provide(scope=Scope.REQUEST)
     def get_scenario_state_repository(
         self,
-        session: Session,
+        session: AsyncSession,
     ) -> ScenarioStateRepository:
         return ScenarioStateRepository(session=session)
 
+    @provide(scope=Scope.REQUEST)
+    def get_state_candidate_repository(
+        self,
+        session: AsyncSession,
+    ) -> StateCandidateRepository:
+        return StateCandidateRepository(session=session)
+
+    @provide(scope=Scope.REQUEST)
+    def get_scenario_memory_repository(
+        self,
+        session: AsyncSession,
+    ) -> ScenarioMemoryRepository:
+        return ScenarioMemoryRepository(session=session)
+
     @provide(scope=Scope.REQUEST)
     def get_poll_repository(
         self,
-        session: Session,
+        session: AsyncSession,
     ) -> PollRepository:
         return PollRepository(session=session)
 
     @provide(scope=Scope.REQUEST)
     def get_message_repository(
         self,
-        session: Session,
+        session: AsyncSession,
     ) -> MessageRepository:
         return MessageRepository(session=session)
 
+    @provide(scope=Scope.REQUEST)
+    def get_outbox_repository(
+        self,
+        session: AsyncSession,
+    ) -> OutboxRepository:
+        return OutboxRepository(session=session)
+
+    @provide(scope=Scope.REQUEST)
+    def get_cycle_run_repository(
+        self,
+        session: AsyncSession,
+    ) -> CycleRunRepository:
+        return CycleRunRepository(session=session)
+
 
 class IntegrationsProvider(Provider):
     scope = Scope.REQUEST
 
+    @provide(scope=Scope.APP)
+    def get_circuit_breakers(
+        self,
+        settings: CircuitBreakerSettings,
+    ) -> CircuitBreakerRegistry:
+        return CircuitBreakerRegistry(
+            failure_threshold=settings.failure_threshold,
+            recovery_timeout=settings.recovery_timeout,
+        )
+
     @provide(scope=Scope.APP)
     def get_gemini_client(
         self,
         settings: GeminiSettings,
-    ) -> GeminiClient:
-        return GeminiClient(
-            api_key=settings.api_key,
+        scheduler_settings: SchedulerSettings,
+        breakers: CircuitBreakerRegistry,
+    ) -> AsyncGeminiClient:
+        return AsyncGeminiClient(
+            settings=settings,
             model="gemini-2.5-flash-preview-04-17",
+            breakers=breakers,
+            call_deadline=scheduler_settings.lease * LLM_CALL_LEASE_SHARE,
         )
 
     @provide(scope=Scope.APP)
-    def get_telegram_client(
+    def get_telegram_rate_limiter(
         self,
         settings: TelegramSettings,
-    ) -> TelegramClient:
-        return TelegramClient(token=settings.token)
+    ) -> TelegramRateLimiter:
+        return TelegramRateLimiter(
+            global_rate=settings.global_rate,
+            global_burst=settings.global_rate,
+            chat_rate=settings.chat_rate_per_minute / 60,
+            chat_burst=settings.chat_burst,
+        )
+
+    @provide(scope=Scope.APP)
+    async def get_telegram_client(
+        self,
+        settings: TelegramSettings,
+        rate_limiter: TelegramRateLimiter,
+        breakers: CircuitBreakerRegistry,
+    ) -> AsyncIterable[AsyncTelegramClient]:
+        client = AsyncTelegramClient(
+            settings=settings,
+            rate_limiter=rate_limiter,
+            breakers=breakers,
+        )
+        yield client
+        await client.close()
+
+    @provide(scope=Scope.APP)
+    def get_outbox_dispatcher(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        telegram_client: AsyncTelegramClient,
+        settings: OutboxSettings,
+    ) -> OutboxDispatcher:
+        return OutboxDispatcher(
+            session_maker=session_maker,
+            telegram_client=telegram_client,
+            settings=settings,
+        )
 
 
 class ScenarioProvider(Provider):
     scope = Scope.REQUEST
+    scenario_settings = from_context(
+        provides=ScenarioSettings,
+        scope=Scope.REQUEST,
+    )
 
     def __init__(
         self,
-        scenario_name: str,
-        scenario_cls: type[ScenarioProtocol],
+        scenarios: Mapping[str, type[ScenarioProtocol]],
     ):
         super().__init__()
-        self._scenario_name = scenario_name
-        self._scenario_cls = scenario_cls
+        self._scenarios = scenarios
 
-    @provide(scope=Scope.APP)
-    def get_scenario_settings(
+    @provide(scope=Scope.REQUEST)
+    def get_scenario_data_managers(
         self,
-        settings: AppSettings,
-    ) -> ScenarioSettings:
-        tg_chat_id = os.getenv(f"{self._scenario_name.upper()}_TG_CHAT_ID", "")
-        return ScenarioSettings(
-            scenario_name=self._scenario_name,
-            scenario_dir_path=settings.scenarios_path / self._scenario_name,
-            tg_chat_id=tg_chat_id,
+        state_manager: StateManager,
+        poll_manager: PollManager,
+        publication_manager: PublicationManager,
+        memory_manager: MemoryManager,
+    ) -> ScenarioDataManagers:
+        return ScenarioDataManagers(
+            state=state_manager,
+            poll=poll_manager,
+            publication=publication_manager,
+            memory=memory_manager,
         )
 
     @provide(scope=Scope.REQUEST)
     def get_scenario_manager(
         self,
         scenario: ScenarioProtocol,
-        state_manager: StateManager,
-        poll_manager: PollManager,
-        publication_manager: PublicationManager,
+        managers: ScenarioDataManagers,
+        cycle_run_manager: CycleRunManager,
         transaction_manager: TransactionManager,
+        context_builder: ContextBuilder,
     ) -> ScenarioManager:
         return ScenarioManager(
             scenario=scenario,
-            state_manager=state_manager,
-            poll_manager=poll_manager,
-            publication_manager=publication_manager,
+            managers=managers,
+            cycle_run_manager=cycle_run_manager,
             transaction_manager=transaction_manager,
+            context_builder=context_builder,
         )
 
     @provide(scope=Scope.REQUEST)
@@ -169,46 +352,89 @@ class ScenarioProvider(Provider):
         self,
         scenario_settings: ScenarioSettings,
         prompt_manager: PromptManager,
+        context_builder: ContextBuilder,
     ) -> ScenarioProtocol:
-        return self._scenario_cls(
+        scenario_cls = self._scenarios[scenario_settings.scenario_name]
+        return scenario_cls(
             settings=scenario_settings,
             prompt_manager=prompt_manager,
+            context_builder=context_builder,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def get_context_builder(
+        self,
+        scenario_settings: ScenarioSettings,
+    ) -> ContextBuilder:
+        return ContextBuilder(
+            max_tokens=scenario_settings.context_token_budget,
         )
 
+    @provide(scope=Scope.APP)
+    def get_prompt_registry(self) -> PromptRegistry:
+        return PromptRegistry()
+
     @provide(scope=Scope.REQUEST)
     def get_prompt_manager(
         self,
+        registry: PromptRegistry,
         scenario_settings: ScenarioSettings,
     ) -> PromptManager:
-        return PromptManager(dir_path=scenario_settings.scenario_dir_path)
+        return registry.get(dir_path=scenario_settings.scenario_dir_path)
 
     @provide(scope=Scope.REQUEST)
     def get_state_manager(
         self,
         state_repository: ScenarioStateRepository,
-        gemini_client: GeminiClient,
+        candidate_repository: StateCandidateRepository,
+        gemini_client: AsyncGeminiClient,
+        response_cache: LLMResponseCache,
+        telemetry: LLMTelemetry,
     ) -> StateManager:
         return StateManager(
             state_repository=state_repository,
+            candidate_repository=candidate_repository,
             gemini_client=gemini_client,
+            response_cache=response_cache,
+            telemetry=telemetry,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def get_memory_manager(
+        self,
+        memory_repository: ScenarioMemoryRepository,
+        gemini_client: AsyncGeminiClient,
+        telemetry: LLMTelemetry,
+    ) -> MemoryManager:
+        return MemoryManager(
+            memory_repository=memory_repository,
+            gemini_client=gemini_client,
+            telemetry=telemetry,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def get_cycle_run_manager(
+        self,
+        cycle_run_repository: CycleRunRepository,
+        settings: SchedulerSettings,
+    ) -> CycleRunManager:
+        return CycleRunManager(
+            cycle_run_repository=cycle_run_repository,
+            stale_after=timedelta(seconds=settings.lease),
         )
 
     @provide(scope=Scope.REQUEST)
     def get_publication_manager(
         self,
-        telegram_client: TelegramClient,
-        message_repository: MessageRepository,
+        outbox_repository: OutboxRepository,
     ) -> PublicationManager:
-        return PublicationManager(
-            telegram_client=telegram_client,
-            message_repository=message_repository,
-        )
+        return PublicationManager(outbox_repository=outbox_repository)
 
     @provide(scope=Scope.REQUEST)
     def get_poll_manager(
         self,
         poll_repository: PollRepository,
-        telegram_client: TelegramClient,
+        telegram_client: AsyncTelegramClient,
     ) -> PollManager:
         return PollManager(
             poll_repository=poll_repository,
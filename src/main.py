@@ -1,7 +1,14 @@
-from dishka import make_container
+import asyncio
+import logging
 
+from dishka import make_async_container
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.config.scenarios import load_scenario_settings
 from core.config.settings import AppSettings, load_app_settings
-from core.engine.scenario_manager import ScenarioManager
+from core.engine.outbox_dispatcher import OutboxDispatcher
+from core.engine.scheduler import ScenarioScheduler
+from core.infra.db.pool_metrics import PoolMetrics
 from core.interfaces import ScenarioProtocol
 from ioc import (
     AppProvider,
@@ -11,28 +18,51 @@ from ioc import (
 )
 from scenarios.astrocatcoin.scenario import AstroCatCoinScenario
 
+logger = logging.getLogger(__name__)
+
+SCENARIOS: dict[str, type[ScenarioProtocol]] = {
+    "astrocatcoin": AstroCatCoinScenario,
+}
+
 
-def run_scenario(scenario_name: str, scenario_cls: type[ScenarioProtocol]):
+async def run_daemon(scenarios: dict[str, type[ScenarioProtocol]]):
     settings = load_app_settings()
-    container = make_container(
+    container = make_async_container(
         AppProvider(),
         DatabaseProvider(),
         IntegrationsProvider(),
-        ScenarioProvider(
-            scenario_name=scenario_name,
-            scenario_cls=scenario_cls,
-        ),
+        ScenarioProvider(scenarios=scenarios),
         context={AppSettings: settings},
     )
-    settings = container.get(AppSettings)
-    with container() as c_req:
-        sc_manager = c_req.get(ScenarioManager)
-        sc_manager.run_poll_cycle()
-        sc_manager.run_generation_cycle()
-        sc_manager.run_news_cycle()
-    print(settings)
-    container.close()
+    scheduler = ScenarioScheduler(
+        container=container,
+        session_maker=await container.get(async_sessionmaker[AsyncSession]),
+        scenarios=[
+            load_scenario_settings(
+                scenario_name=scenario_name,
+                scenarios_path=settings.scenarios_path,
+            )
+            for scenario_name in scenarios
+        ],
+        settings=settings.scheduler,
+    )
+    pool_metrics = await container.get(PoolMetrics)
+    dispatcher = await container.get(OutboxDispatcher)
+    dispatching = asyncio.create_task(dispatcher.run(), name="outbox")
+    try:
+        await scheduler.run()
+    finally:
+        # Пачка, взятая в работу, дописывается до конца: иначе отправленные
+        # публикации уйдут повторно после истечения аренды
+        dispatcher.stop()
+        await dispatching
+        logger.info(f"Database pool: {pool_metrics.status()}")
+        await container.close()
 
 
 if __name__ == "__main__":
-    run_scenario("astrocatcoin", AstroCatCoinScenario)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run_daemon(SCENARIOS))
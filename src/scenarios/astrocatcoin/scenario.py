@@ -3,19 +3,24 @@ import random
 from typing import Any
 
 from core.config.scenarios import ScenarioSettings
-from core.engine.prompt_manager import PromptManager
+from core.engine.context_builder import ContextBuilder
+from core.engine.prompt_manager import PromptManager, RenderedPrompt
 from core.interfaces import ScenarioProtocol
 from scenarios.astrocatcoin.schemas import StateSchema
 
 
 class AstroCatCoinScenario(ScenarioProtocol):
+    context_fields = ("title", "current_price", "question", "options", "text")
+
     def __init__(
         self,
         settings: ScenarioSettings,
         prompt_manager: PromptManager,
+        context_builder: ContextBuilder,
     ):
         self.settings = settings
         self.prompt_manager = prompt_manager
+        self.context_builder = context_builder
 
     def get_settings(self) -> ScenarioSettings:
         return self.settings
@@ -29,7 +34,7 @@ class AstroCatCoinScenario(ScenarioProtocol):
         random_value = random.randint(0, 50)
         return random_value == 0
 
-    def initialize_prompt(self) -> str:
+    def initialize_prompt(self) -> RenderedPrompt:
         base_context = self.prompt_manager.get_base_context()
         updated_context = self.prompt_manager.update_context(
             base_context=base_context,
@@ -41,23 +46,29 @@ class AstroCatCoinScenario(ScenarioProtocol):
                 ),
             },
         )
-        return self.prompt_manager.render_prompt(context=updated_context)
+        return self.prompt_manager.render_split_prompt(context=updated_context)
 
     def next_state_prompt(
         self,
         previous_state: StateSchema,
         chosen_option: dict[str, Any],
-    ) -> str:
+        memory: str | None = None,
+    ) -> RenderedPrompt:
         base_context = self.prompt_manager.get_base_context()
+        memory_values = {} if memory is None else {"memory": memory}
         updated_context = self.prompt_manager.update_context(
             base_context=base_context,
             new_values={
-                "previous_state": previous_state,
-                "chosen_option": chosen_option,
+                **memory_values,
+                "previous_state": self.context_builder.build(
+                    previous_state,
+                    fields=self.context_fields,
+                ),
+                "chosen_option": self.context_builder.build(chosen_option),
                 "trigger_major_event": self.set_trigger_major_event(),
             },
         )
-        return self.prompt_manager.render_prompt(context=updated_context)
+        return self.prompt_manager.render_split_prompt(context=updated_context)
 
     def build_post_content(
         self,